@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+'''
+Counts the nodes that astar() expands on a road-like grid, once without a
+heuristic, which is plain Dijkstra with an early exit, and once with the
+landmarks() heuristic.
+
+    python3 benchmarks/astar.py [width] [landmarks]
+
+The grid is width x width nodes, with an edge in both directions between
+horizontal and vertical neighbours and weights drawn from 1..5.
+'''
+import os
+import sys
+import time
+import random
+import logging
+
+log = logging.getLogger(__name__)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from adjlist import AdjacencyList
+from algorithm import astar, landmarks
+
+
+def grid(rnd, width):
+    '''
+    Returns the grid graph, where node "xxxyyy" sits at column x and row y.
+    '''
+    edges = []
+    for x in range(width):
+        for y in range(width):
+            for (dx, dy) in ((1, 0), (0, 1)):
+                if x+dx < width and y+dy < width:
+                    a, b, w = "%03d%03d" % (x, y), "%03d%03d" % (x+dx, y+dy), rnd.randint(1, 5)
+                    edges += [ (a, b, w), (b, a, w) ]
+    return AdjacencyList.from_edges(edges)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    graph = grid(random.Random(1), width)
+    src = "%03d%03d" % (width // 15, width // 15)
+    dst = "%03d%03d" % (width - width // 15, width - 2 * (width // 15))
+
+    begin = time.perf_counter()
+    heuristic = landmarks(graph, count)
+    print("landmarks: {} chosen in {:.2f}s".format(count, time.perf_counter() - begin))
+
+    for (label, h) in (("dijkstra", None), ("landmarks", heuristic)):
+        stats = {}
+        begin = time.perf_counter()
+        cost, path = astar(graph, src, dst, h, stats)
+        print("{}: cost {}, {} nodes expanded, {:.3f}s".format(label, cost, stats["expanded"],
+                                                             time.perf_counter() - begin))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+'''
+Builds a graph with 100k nodes and 1M edges and queries it, to show that no
+traversal runs into the recursion limit.
+
+    python3 benchmarks/build_query.py [nodes] [edges] [order]
+
+`order` picks how the graph is built:
+
+    descending  public add_node() in descending name order, then add_edge()
+    ascending   public add_node() in ascending name order, then add_edge()
+    random      public add_node() in random name order, then add_edge()
+    bulk        AdjacencyList.from_edges() in one call
+
+add_node() walks the ordered chain to its insertion point, so descending
+order is O(1) per node, but ascending and random order are O(N) per node.
+Those two take minutes at 100k nodes, so they are better tried with fewer.
+Each add_edge() only walks the edge chain of its source node.
+'''
+import os
+import sys
+import time
+import random
+import logging
+
+log = logging.getLogger(__name__)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from adjlist import AdjacencyList
+
+
+def build(names, edges, order, rnd):
+    '''
+    Returns an adjacency list with the nodes `names` and the (src, dst,
+    weight) triples in `edges`, built as described by `order`.
+    '''
+    if order == "bulk":
+        return AdjacencyList.from_edges(edges, names)
+    if order == "descending":
+        names = sorted(names, reverse=True)
+    elif order == "ascending":
+        names = sorted(names)
+    elif order == "random":
+        names = list(names)
+        rnd.shuffle(names)
+    else:
+        raise ValueError("unknown order '{}'".format(order))
+
+    adjlist = AdjacencyList()
+    for name in names:
+        adjlist = adjlist.add_node(name)
+    for (src, dst, weight) in edges:
+        adjlist = adjlist.add_edge(src, dst, weight)
+    return adjlist
+
+def timed(label, run):
+    '''
+    Returns run(), after printing how long it took.
+    '''
+    begin = time.perf_counter()
+    result = run()
+    print("{}: {:.2f}s".format(label, time.perf_counter() - begin))
+    return result
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    order = sys.argv[3] if len(sys.argv) > 3 else "descending"
+    print("recursion limit: {}".format(sys.getrecursionlimit()))
+
+    rnd = random.Random(2)
+    names = [ "%07d" % i for i in range(n) ]
+    edges = [ (rnd.choice(names), rnd.choice(names), rnd.randint(1, 100)) for _ in range(m) ]
+    adjlist = timed("build ({}, {} nodes, {} edges)".format(order, n, m), lambda: build(names, edges, order, rnd))
+
+    probes = rnd.sample(edges, 1000)
+    timed("1000 find_node", lambda: [ adjlist.find_node(src) for (src, dst, weight) in probes ])
+    timed("1000 find_edge", lambda: [ adjlist.find_edge(src, dst) for (src, dst, weight) in probes ])
+    timed("node_cardinality", adjlist.node_cardinality)
+    timed("edge_cardinality", adjlist.edge_cardinality)
+    timed("self_loops", adjlist.self_loops)
+    listed = timed("list_edges", adjlist.list_edges)
+    print("{} nodes, {} edges listed, consistent: {}".format(adjlist.node_cardinality(), len(listed),
+                                                          adjlist.is_consistent()))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+'''
+Reports the memory that an adjacency list takes per node and per edge, as
+traced by tracemalloc, and how much of the per-edge cost is the Edge cells
+themselves and how much is the incoming-edge index.
+
+    python3 benchmarks/memory.py [nodes] [edges]
+
+The graphs are built with AdjacencyList.from_edges().  Names and weights are
+created before tracing starts, so only the graph structures are counted.
+'''
+import os
+import sys
+import random
+import logging
+import tracemalloc
+
+log = logging.getLogger(__name__)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from adjlist import AdjacencyList, Edge
+
+
+def traced(build):
+    '''
+    Returns build() and the number of bytes that it left allocated.
+    '''
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    rnd = random.Random(0)
+    names = [ "n%06d" % i for i in range(n) ]
+    edges = [ (rnd.choice(names), rnd.choice(names), rnd.randint(1, 9)) for _ in range(m) ]
+    pairs = sorted((dst, weight) for (src, dst, weight) in edges)
+
+    empty, node_bytes = traced(lambda: AdjacencyList.from_edges([], names))
+    chain, cell_bytes = traced(lambda: Edge._link(pairs))
+
+    # Traced in one go, so that dropping the incoming-edge index, which is part
+    # of the shared state, shows how much of the graph it takes
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    graph = AdjacencyList.from_edges(edges, names)
+    total_bytes = tracemalloc.get_traced_memory()[0] - before
+    graph._state.preds = {}
+    index_bytes = before + total_bytes - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    m = graph.edge_cardinality() # Duplicate edges are merged
+
+    print("{} nodes, {} edges".format(n, m))
+    print("bytes per node: {:.1f}".format(node_bytes / n))
+    print("bytes per edge: {:.1f}".format((total_bytes - node_bytes) / m))
+    print("  Edge cell: {:.1f}".format(cell_bytes / len(pairs)))
+    print("  incoming-edge index: {:.1f}".format(index_bytes / m))
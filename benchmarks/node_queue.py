@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+'''
+Checks that dijkstra() and prim() on the heap-based NodeQueue return exactly
+what the original sort-based code returned, including how ties between equal
+keys are broken and that nodes at key 0 get None, and then times both on a
+larger graph.  The original code is kept below as it was, apart from names.
+
+    python3 benchmarks/node_queue.py [nodes]
+
+Exits with status 1 on the first mismatch.
+'''
+import os
+import sys
+import time
+import random
+import logging
+
+log = logging.getLogger(__name__)
+
+from math import inf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from adjlist import AdjacencyList
+from algorithm import dijkstra, prim
+
+
+def original_dijkstra(adjlist, start_node):
+    '''
+    Returns dijkstra(adjlist, start_node), computed by the original code that
+    keeps its working state in the node info and stable-sorts the queue of
+    unvisited nodes by key before every pop.  It overwrites the node info.
+    '''
+    d = [None] * adjlist.node_cardinality()
+    e = [None] * adjlist.node_cardinality()
+    q = []
+    s = []
+    original_init(adjlist, q, start_node)
+    while len(q) != 0:
+        q.sort(key=lambda node: node.info()[0])
+        u = q.pop(0)
+        s.append(u)
+        for edge in u.getListOfEdges():
+            v = adjlist.getNode(edge.dst())
+            if v in q:
+                original_relax(v, u, edge.weight())
+    s.sort(key=lambda node: node.name())
+    for index, node in enumerate(s):
+        if node.info()[0] == 0:
+            d[index] = None
+            e[index] = None
+        else:
+            d[index] = node.info()[0]
+            e[index] = node.info()[1]
+    return d, e
+
+def original_relax(v, u, weight):
+    '''
+    The original relax step of original_dijkstra().
+    '''
+    if v.info()[0] > u.info()[0] + weight:
+        v.set_info([(u.info()[0] + weight), u.name()])
+
+def original_init(adjlist, q, start_node):
+    '''
+    Queues all nodes of adjlist in q with key inf, except start_node with 0.
+    '''
+    q.extend(adjlist.getListOfNodes())
+    for node in q:
+        if node.name() == start_node:
+            node.set_info([0, None, None])
+        else:
+            node.set_info([inf, None, None])
+
+def original_prim(adjlist, start_node):
+    '''
+    Returns prim(adjlist, start_node), computed by the original code, see
+    original_dijkstra().
+    '''
+    l = [None] * adjlist.node_cardinality()
+    c = [None] * adjlist.node_cardinality()
+    q = []
+    original_init(adjlist, q, start_node)
+    while len(q) != 0:
+        q.sort(key=lambda node: node.info()[0])
+        u = q.pop(0)
+        for edge in u.getListOfEdges():
+            dstNode = adjlist.getNode(edge.dst())
+            if dstNode in q and edge.weight() < dstNode.info()[0]:
+                dstNode.set_info([edge.weight(), u.name()])
+    for index, node in enumerate(adjlist.getListOfNodes()):
+        if node.info()[0] == 0:
+            l[index] = None
+            c[index] = None
+        else:
+            l[index] = node.info()[0]
+            c[index] = node.info()[1]
+    return l, c
+
+def random_graph(rnd, n, degree, weights):
+    '''
+    Returns the nodes and edges of an undirected graph with n nodes, about
+    n*degree random edges in each direction, and weights drawn from
+    0..weights.  Few distinct weights give many equal keys, which is what
+    exercises the tie-breaking, and zero weights give nodes at key 0.
+    '''
+    names = [ "%05d" % i for i in range(n) ]
+    edges = []
+    for _ in range(n * degree):
+        a, b, w = rnd.choice(names), rnd.choice(names), rnd.randint(0, weights)
+        edges += [ (a, b, w), (b, a, w) ]
+    return names, edges
+
+def compare(seeds=40):
+    '''
+    Returns True if both queues agree on small random graphs with many ties.
+    '''
+    for seed in range(seeds):
+        rnd = random.Random(seed)
+        names, edges = random_graph(rnd, rnd.randint(50, 400), 3, 2)
+        for start in rnd.sample(names, 5):
+            for (fast, slow) in ((dijkstra, original_dijkstra), (prim, original_prim)):
+                # A fresh graph each time, since the original code overwrites node info
+                if fast(AdjacencyList.from_edges(edges, names), start) != \
+                   slow(AdjacencyList.from_edges(edges, names), start):
+                    log.error("{} differs for seed {}, start node {}".format(fast.__name__, seed, start))
+                    return False
+    return True
+
+def benchmark(n):
+    '''
+    Prints the time that each queue takes for one dijkstra() and one prim()
+    run on a random graph with n nodes.
+    '''
+    names, edges = random_graph(random.Random(9), n, 4, 50)
+    graph, start = AdjacencyList.from_edges(edges, names), names[0]
+    for (label, run_dijkstra, run_prim) in (("heap", dijkstra, prim), ("sort", original_dijkstra, original_prim)):
+        begin = time.perf_counter()
+        run_dijkstra(graph, start)
+        run_prim(graph, start)
+        print("{}: {:.3f}s".format(label, time.perf_counter() - begin))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not compare():
+        sys.exit(1)
+    print("heap and sort queues agree")
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
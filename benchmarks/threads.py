@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+'''
+Runs dijkstra() and prim() from many start nodes in several threads at once,
+all on the same adjacency list, and checks that every result matches a
+serial run and that no node info was touched.
+
+    python3 benchmarks/threads.py [nodes] [threads]
+
+The algorithms keep their working state in local arrays and share the
+graph's cached CSR snapshot, so the threads need no locks and no copies.
+With the GIL, threads are about correctness rather than speed; see
+dijkstra_many() for a process pool.  Exits with status 1 on a mismatch.
+'''
+import os
+import sys
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from adjlist import AdjacencyList
+from algorithm import dijkstra, prim
+
+
+def run(task):
+    '''
+    Returns algorithm(graph, start) for task = (algorithm, graph, start).
+    '''
+    algorithm, graph, start = task
+    return algorithm(graph, start)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    rnd = random.Random(3)
+    names = [ "%05d" % i for i in range(n) ]
+    edges = []
+    for _ in range(n * 4):
+        a, b, w = rnd.choice(names), rnd.choice(names), rnd.randint(1, 50)
+        edges += [ (a, b, w), (b, a, w) ]
+    graph = AdjacencyList.from_edges(edges, names)
+    for node in graph.getListOfNodes():
+        node.set_info(node.name())
+    tasks = [ (algorithm, graph, start) for start in rnd.sample(names, 16) for algorithm in (dijkstra, prim) ]
+
+    begin = time.perf_counter()
+    expected = [ run(task) for task in tasks ]
+    print("serial: {:.2f}s".format(time.perf_counter() - begin))
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(run, tasks))
+    print("{} threads: {:.2f}s".format(threads, time.perf_counter() - begin))
+
+    if results != expected:
+        log.error("a threaded run differs from the serial run")
+        sys.exit(1)
+    if any(node.info() != node.name() for node in graph.getListOfNodes()):
+        log.error("node info was modified")
+        sys.exit(1)
+    print("{} runs agree, node info untouched".format(len(tasks)))
@@ -4,13 +4,78 @@ import logging
 log = logging.getLogger(__name__)
 
 from math import inf
+from heapq import heappop, heappush
+from csr import CSRGraph, next_version, clear_matrix
+
+
+class _GraphState:
+    '''
+    Bookkeeping that is shared by every node of one adjacency list, e.g., a
+    name->node index that makes membership tests and node lookups O(1).
+    '''
+    def __init__(self, head):
+        self.head = head # current head node
+        self.nodes = { head.name(): head } # node name -> node
+        self.edges = 0 # number of edges
+        self.preds = {} # node name -> set of names with an edge towards it
+        self.snapshot = None # CSRGraph of the current nodes and edges
+        self.version = next_version() # stamp that changes on every mutation
+        self.stamps = {} # sublist cell -> its own stamp for the current version
+        self.ids = { head.name(): 0 } # node name -> dense integer id
+        self.names = [ head.name() ] # id -> node name, None if the id is free
+        self.free = [] # heap of free ids, reused smallest first
+
+    def add(self, node):
+        '''
+        Indexes `node` and gives it the smallest free id.
+        '''
+        self.nodes[node.name()] = node
+        if len(self.free) != 0:
+            i = heappop(self.free)
+        else:
+            i = len(self.names)
+            self.names.append(None)
+        self.ids[node.name()] = i
+        self.names[i] = node.name()
+
+    def remove(self, name):
+        '''
+        Drops node `name` from the index and frees its id.
+        '''
+        del self.nodes[name]
+        i = self.ids.pop(name)
+        self.names[i] = None
+        heappush(self.free, i)
+
+    def changed(self):
+        '''
+        Bumps the version and drops everything that was derived from the nodes
+        and edges.
+        '''
+        self.version = next_version()
+        self.snapshot = None
+        self.stamps = {}
 
 
 class AdjacencyList:
     '''
     A linked-list implementation of an adjacency list that keeps its nodes and
     edges lexicographically ordered at all times.
+
+    Next to the ordered chain, all nodes of the same list share a name->node
+    index and name<->stable id tables that are kept in sync by `add_node` and
+    `delete_node`, as well as node and edge counters and an incoming-edge index
+    that are kept in sync by all node and edge operations.  Those operations
+    therefore have to be called on the head of the list, not on a sublist such
+    as a tail().
+
+    Cells are slot-based, and every chain ends in the same shared empty cell,
+    which cannot be modified.  set_edges() keeps the shared state in sync,
+    but cons() and set_name() only relink or rename a cell, so nodes of a list
+    are added, deleted and renamed through the node operations.
     '''
+    __slots__ = ("_name", "_info", "_tail", "_edges", "_state")
+
     def __init__(self, name=None, info=None):
         '''
         Initializes a new adjacency list.  It is considered empty if no head
@@ -18,9 +83,78 @@ class AdjacencyList:
         '''
         self._name = name # head node name
         self._info = info # head node info
+        self._state = None # shared bookkeeping, None if empty
         if not self.head().is_empty():
-            self._tail = AdjacencyList() # empty tail
-            self._edges = Edge() # empty list of edges
+            self._tail = AdjacencyList._empty # shared empty tail
+            self._edges = Edge._empty # shared empty list of edges
+            self._state = _GraphState(self)
+
+    @classmethod
+    def _cell(cls, name, info, state):
+        '''
+        Returns a new node that joins the shared bookkeeping `state`, without
+        building a _GraphState of its own.  The caller indexes and links it.
+        '''
+        node = cls.__new__(cls)
+        node._name, node._info, node._state = name, info, state
+        node._tail, node._edges = AdjacencyList._empty, Edge._empty
+        return node
+
+    @classmethod
+    def from_edges(cls, edges, nodes=()):
+        '''
+        Returns a new adjacency list with the nodes in `nodes`, and with the
+        (src, dst, weight) triples in `edges` as edges.  Nodes that are only
+        named by an edge are added as well.  If an edge occurs more than once,
+        its last weight is kept.
+
+        Instead of one ordered insertion per node and edge, everything is
+        sorted once and the chains are then linked in a single pass.
+        '''
+        edges = sorted(edges, key=lambda edge: (edge[0], edge[1])) # stable
+        names = set(nodes)
+        for (src, dst, weight) in edges:
+            names.add(src)
+            names.add(dst)
+        if len(names) == 0:
+            return cls()
+
+        head, prev, i = None, None, 0
+        for name in sorted(names):
+            if head is None:
+                node = head = cls(name)
+            else:
+                node = cls._cell(name, None, head._state)
+                head._state.add(node)
+                prev.cons(node)
+            prev = node
+
+            # Collect this node's edges, skipping all but the last duplicate
+            out = []
+            while i < len(edges) and edges[i][0] == name:
+                if i+1 == len(edges) or edges[i+1][:2] != edges[i][:2]:
+                    out.append(edges[i])
+                i += 1
+
+            for (src, dst, weight) in out:
+                head._state.preds.setdefault(dst, set()).add(src)
+            node._set_edges(Edge._link([ (dst, weight) for (src, dst, weight) in out ]))
+            head._state.edges += len(out)
+
+        return head
+
+    def batch(self):
+        '''
+        Returns a Batch that records node and edge operations and merges them
+        into this adjacency list in one pass when it is used as a context:
+
+            with adjlist.batch() as b:
+                b.add_node("a")
+                b.add_edge("a", "a", 3)
+            adjlist = b.head()
+        '''
+        self._check_head()
+        return Batch(self)
 
     def is_empty(self):
         '''
@@ -43,7 +177,10 @@ class AdjacencyList:
     def cons(self, tail):
         '''
         Returns the head of this adjacency list with a newly attached tail.
+
+        This only relinks the cell; the shared index is not updated.
         '''
+        self._mutable()
         self._tail = tail
         return self.head()
 
@@ -70,28 +207,69 @@ class AdjacencyList:
         Sets the node name to `name`.
 
         Returns an adjacency list head.
+
+        This only renames the cell; the shared index is not updated.
         '''
+        self._mutable()
         self._name = name
         return self.head()
 
     def set_info(self, info):
         '''
-        Sets the auxilirary info of this node to `info`.
+        Sets the auxilirary info of this node to `info`.  Like the node and
+        edge operations, this bumps the version.
 
         Returns an adjacency list head.
         '''
+        self._mutable()
         self._info = info
+        self._state.changed()
         return self.head()
 
     def set_edges(self, edges):
         '''
-        Sets the edge head of this node to `edges`.
+        Sets the edge head of this node to `edges`.  If this node is a member,
+        the edge counter and the incoming-edge index are reconciled with the
+        new chain, and the version is bumped.  This is how an edge chain that
+        was edited with Edge.add(), Edge.delete() or the Edge setters is
+        reattached.
 
         Returns an adjacency list head.
         '''
+        self._mutable()
+        state, name = self._state, self._name
+        if state.nodes.get(name) is self:
+            # The old chain may have been edited in place, so its edges are
+            # taken from the incoming-edge index instead
+            for srcs in state.preds.values():
+                if name in srcs:
+                    srcs.discard(name)
+                    state.edges -= 1
+            edge = edges
+            while not edge.is_empty():
+                if name not in state.preds.setdefault(edge.dst(), set()):
+                    state.preds[edge.dst()].add(name)
+                    state.edges += 1
+                edge = edge.tail()
+            state.changed()
         self._edges = edges
         return self.head()
 
+    def _set_edges(self, edges):
+        '''
+        Sets the edge head of this node to `edges` without touching the shared
+        state, for the node and edge operations that keep it in sync.
+        '''
+        self._edges = edges
+
+    def _mutable(self):
+        '''
+        Raises TypeError if this adjacency list is empty, since empty lists are
+        shared and must not be modified.
+        '''
+        if self.is_empty():
+            raise TypeError("an empty adjacency list cannot be modified")
+
 
         
             
@@ -108,16 +286,48 @@ class AdjacencyList:
         '''
         if self.is_empty():
             return AdjacencyList(name, info)
+        self._check_head()
 
-        #When name is smaller than original head value
-        if name < self.name():
-            newHead = AdjacencyList(name, info)
-            return newHead.cons(self.head())
+        #When node already exists - Only update info
+        if self.find_node(name):
+            self.getNode(name).set_info(info)
+            return self.head()
 
-        #When new value is larger
-        else:
-            self.cons(self.tail().add_node(name, info))
-            
+        newNode = AdjacencyList._cell(name, info, self._state)
+        self._state.add(newNode)
+        self._state.changed()
+        head = self._insert_node(newNode)
+        self._state.head = head
+        return head
+
+    def _check_head(self):
+        '''
+        Raises ValueError if this is a sublist, e.g., a tail(), rather than the
+        current head of its adjacency list.  All nodes share one index and set
+        of counters, so node and edge operations on a sublist would corrupt
+        the list that it is part of.
+        '''
+        if self._state is not None and self is not self._state.head:
+            raise ValueError("node and edge operations need the head of the adjacency list")
+
+    def _insert_node(self, node):
+        '''
+        Links `node` into this adjacency list in lexicographical order.
+
+        Returns an adjacency list head.
+        '''
+        if self.is_empty():
+            return node
+
+        #When name is smaller than original head value
+        if node.name() < self.name():
+            return node.cons(self.head())
+
+        #When new value is larger - Walk to the last smaller node
+        prev = self.head()
+        while not prev.tail().is_empty() and prev.tail().name() < node.name():
+            prev = prev.tail()
+        prev.cons(node.cons(prev.tail()))
         return self.head()
 
     def delete_node(self, name):
@@ -126,15 +336,35 @@ class AdjacencyList:
 
         Returns an adjacency list head.
         '''
-        if self.head().is_empty():
+        self._check_head()
+        if not self.find_node(name):
             return self.head()
+        edge = self.getNode(name).edges()
+        while not edge.is_empty():
+            self._state.edges -= 1
+            self._state.preds[edge.dst()].discard(name)
+            edge = edge.tail()
+        self._state.changed()
+        head = self._unlink_node(name)
+        self._state.head = head
+        return head
+
+    def _unlink_node(self, name):
+        '''
+        Unlinks the node named `name` from this adjacency list.
+
+        Returns an adjacency list head.
 
+        Pre: `name` is a member of this adjacency list.
+        '''
+        self._state.remove(name)
         if name == self.name():
             return self.tail()
 
-        elif name > self.name():
-            return self.cons(self.tail().delete_node(name))
-
+        prev = self.head()
+        while prev.tail().name() != name:
+            prev = prev.tail()
+        prev.cons(prev.tail().tail())
         return self.head()
 
 
@@ -146,9 +376,48 @@ class AdjacencyList:
         '''
         if self.is_empty():
             return False
-        if name == self.head().name():
-            return True
-        return self.tail().find_node(name)
+        # Nodes before this one share the index but are not part of this list
+        return name in self._state.nodes and name >= self.name()
+
+    def stable_id(self, name):
+        '''
+        Returns the stable integer id of the node named `name`, or None if it
+        is not a member.  Stable ids are dense: a node keeps its id until it is
+        deleted, after which the id is handed to the next new node.
+
+        These are not the lexicographical positions that CSRGraph.node_id()
+        and the algorithms use; they survive node insertions and deletions.
+        '''
+        if not self.find_node(name):
+            return None
+        return self._state.ids[name]
+
+    def stable_name(self, i):
+        '''
+        Returns the name of the node with stable id `i`, or None if no node has
+        it.
+        '''
+        if self.is_empty() or not 0 <= i < len(self._state.names):
+            return None
+        return self._state.names[i]
+
+    def stable_ids(self):
+        '''
+        Returns a copy of the name->stable id table.
+        '''
+        if self.is_empty():
+            return {}
+        return dict(self._state.ids)
+
+    def stable_names(self):
+        '''
+        Returns a copy of the stable id->name table, where free ids map to
+        None.  Its length is an upper bound on every stable id, so it can size
+        arrays that are indexed by them.
+        '''
+        if self.is_empty():
+            return []
+        return list(self._state.names)
 
     def node_cardinality(self):
         '''
@@ -156,8 +425,14 @@ class AdjacencyList:
         '''
         if self.is_empty():
             return 0
-        else: 
-            return (1 + self.tail().node_cardinality())
+        if self is self._state.head:
+            return len(self._state.nodes)
+
+        count, node = 0, self.head()
+        while not node.is_empty():
+            count += 1
+            node = node.tail()
+        return count
 
     ###
     # Edge operations
@@ -170,6 +445,7 @@ class AdjacencyList:
 
         Returns an adjacency list head.
         '''
+        self._check_head()
         if not self.find_node(dst):
             return self.head()
         return self._add_edge(src, dst, weight)
@@ -183,15 +459,13 @@ class AdjacencyList:
 
         Pre: `dst` is a member of this adjacency list.
         '''
-        if self.head().is_empty():
-            return self.head()
-        if src == self.name():
-            self.set_edges(self.edges().add(dst, weight))
-
-        elif src > self.name():
-            self.tail()._add_edge(src, dst, weight)
-        
-
+        node = self.getNode(src)
+        if node:
+            edges, added = node.edges()._add(dst, weight)
+            node._set_edges(edges)
+            self._state.edges += added
+            self._state.preds.setdefault(dst, set()).add(src)
+            self._state.changed()
         return self.head()
 
 
@@ -201,25 +475,41 @@ class AdjacencyList:
 
         Returns an adjacency list head.
         '''
-        if self.head().is_empty():
-            return self.head()
-        if self.name() == src:
-            self.set_edges(self.edges().delete(dst))
-        elif src > self.name():
-            self.tail().delete_edge(src, dst)
-
+        self._check_head()
+        node = self.getNode(src)
+        if node:
+            edges, deleted = node.edges()._delete(dst)
+            node._set_edges(edges)
+            self._state.edges -= deleted
+            self._state.preds.get(dst, set()).discard(src)
+            self._state.changed()
         return self.head()
 
     def delete_edges(self, name):
         '''
-        Deletes all edges towards the node named `name`.
+        Deletes all edges towards the node named `name`.  Only the nodes that
+        have such an edge are visited, see `predecessors`.
 
         Returns an adjacency list head.
         '''
-        if not self.head().is_empty():
-            self.set_edges(self.edges().delete(name))
-            self.tail().delete_edges(name)
+        self._check_head()
+        for src in self.predecessors(name):
+            node = self._state.nodes[src]
+            node._set_edges(node.edges().delete(name))
+            self._state.edges -= 1
+            self._state.preds[name].discard(src)
+        if not self.is_empty():
+            self._state.changed()
         return self.head()
+
+    def predecessors(self, name):
+        '''
+        Returns the names of the nodes in this list that have an edge towards
+        the node named `name`, in lexicographical order.
+        '''
+        if self.is_empty():
+            return []
+        return sorted(src for src in self._state.preds.get(name, ()) if self.find_node(src))
         
 
 
@@ -227,36 +517,83 @@ class AdjacencyList:
         '''
         Returns True if there's an edge from node `src` to node `dst`.
         '''
-        if self.head().is_empty():
+        node = self.getNode(src)
+        if not node:
             return False
-        if src == self.name():
-            return self.edges().find(dst)
-        else:
-            return self.tail().find_edge(src, dst)
+        return node.edges().find(dst)
 
     def edge_cardinality(self):
         '''
         Returns the number of edges.
         '''
-        if self.head().is_empty():
+        if self.is_empty():
             return 0
-        else:
-            return self.edges().cardinality() + self.tail().edge_cardinality()
+        if self is self._state.head:
+            return self._state.edges
+
+        count, node = 0, self.head()
+        while not node.is_empty():
+            count += node.edges().cardinality()
+            node = node.tail()
+        return count
 
     def self_loops(self):
         '''
         Returns the number of loops in this adjacency list.  Note that a loop is
         defined as a node that has an edge towards itself, e.g., A->A.
         '''
-        if self.head().is_empty():
-            return 0
-        else: 
-            if self.edges().find(self.name()) == True:
-                return 1 + self.tail().self_loops()
-            else:
-                return self.tail().self_loops()
+        count, node = 0, self.head()
+        while not node.is_empty():
+            if node.edges().find(node.name()):
+                count += 1
+            node = node.tail()
+        return count
+
+    def is_consistent(self):
+        '''
+        Returns True if the shared index and counters agree with the ordered
+        chain.  Every mismatch is logged, which makes this a debug aid.
+
+        Pre: self is the head of the adjacency list.
+        '''
+        if self.is_empty():
+            return True
 
-    def adjacency_matrix(self):
+        ok, state = True, self._state
+        names, edges, preds, node = [], 0, {}, self.head()
+        while not node.is_empty():
+            if state.nodes.get(node.name()) is not node:
+                log.error("node {} is not indexed".format(node.name()))
+                ok = False
+            names.append(node.name())
+            edges += node.edges().cardinality()
+            for (src, dst, weight) in node.edges().list(node.name()):
+                preds.setdefault(dst, set()).add(src)
+            node = node.tail()
+
+        if names != sorted(names):
+            log.error("nodes are not in lexicographical order")
+            ok = False
+        if len(names) != len(state.nodes):
+            log.error("index has {} nodes, chain has {}".format(len(state.nodes), len(names)))
+            ok = False
+        if state.ids.keys() != state.nodes.keys() or \
+           any(state.names[i] != name for name, i in state.ids.items()) or \
+           len(state.ids) + len(state.free) != len(state.names):
+            log.error("id tables do not match the nodes")
+            ok = False
+        if edges != state.edges:
+            log.error("edge counter is {}, chain has {}".format(state.edges, edges))
+            ok = False
+        if preds != { dst: srcs for dst, srcs in state.preds.items() if srcs }:
+            log.error("incoming-edge index does not match the edges")
+            ok = False
+        if state.head is not self:
+            log.error("head {} is not the tracked head".format(self.name()))
+            ok = False
+        return ok
+
+    def adjacency_matrix(self, sparse=False, out=None):
         '''
         Returns this adjacency list as an adjacency matrix.  For example,
         consider the following adjacency list where all edges have weight=1.
@@ -286,33 +623,94 @@ class AdjacencyList:
 
         Hint: depending on your solution, you may need to add a helper method
         that maps a node's name to it's numeric position in the adjacency list.
-        '''
+
+        If `sparse` is True, only the edges are returned as a dict of dicts,
+        where matrix[i][j] is the weight of the edge from the i:th to the j:th
+        node.  For the example above:
+
+        { 0: {0: 1, 1: 1, 2: 1}, 1: {0: 1, 1: 1}, 2: {2: 1} }
+
+        If `out` is given, the dense matrix is instead written row by row into
+        that flat buffer, e.g., an array('d') or a 1-d float numpy array with
+        room for N*N values, where matrix[i][j] ends up in out[i*N + j].  The
+        buffer is returned.
+
+        Edges towards non-members are left out.  Each edge is placed through a
+        name->column index, so the cost is O(N^2) to fill plus O(E).
+        '''
+        if out is not None:
+            columns = self._columns()
+            n = len(columns)
+            clear_matrix(out, n)
+            for i, node in enumerate(self.getListOfNodes()):
+                edge = node.edges()
+                while not edge.is_empty():
+                    if edge.dst() in columns:
+                        out[i*n + columns[edge.dst()]] = edge.weight()
+                    edge = edge.tail()
+            return out
+
+        if sparse:
+            columns, matrix = self._columns(), {}
+            for i, node in enumerate(self.getListOfNodes()):
+                matrix[i] = {}
+                edge = node.edges()
+                while not edge.is_empty():
+                    if edge.dst() in columns:
+                        matrix[i][columns[edge.dst()]] = edge.weight()
+                    edge = edge.tail()
+            return matrix
+
         if self.is_empty():
             return [[]]
+        return list(self.iter_rows())
 
-        # In case you'd like to create an inf-initialized n x n matrix
-        n = self.node_cardinality()
-        
-        matrix = [ [inf]*n for i in range(n) ]
-
-        listOfNodes = self.getListOfNames()
-        tmpNode = self.head()
-        counter = 0
-        while not tmpNode.is_empty():
-            tmpEdge = tmpNode.edges()
-            for i in range(n):
-                if not tmpEdge.is_empty():
-                    if tmpEdge.dst() == listOfNodes[i]:
-                        matrix[counter][i] = tmpEdge.weight()
-                        tmpEdge = tmpEdge.tail()
-                else:
-                    break
+    def version(self):
+        '''
+        Returns a version stamp that is bumped by every node and edge
+        operation.  Stamps increase monotonically and are never shared by two
+        graphs, so (version) identifies both a graph and its current contents.
 
-            tmpNode = tmpNode.tail()
-            counter += 1
+        A sublist, e.g., a tail(), has fewer nodes than its head and therefore
+        gets a stamp of its own, which is also replaced by every operation.
+        '''
+        if self.is_empty():
+            return 0
+        if self is not self._state.head:
+            if self not in self._state.stamps:
+                self._state.stamps[self] = next_version()
+            return self._state.stamps[self]
+        return self._state.version
 
+    def snapshot(self):
+        '''
+        Returns a frozen CSRGraph of this adjacency list.  The snapshot is
+        cached until the next node or edge operation, so that any number of
+        algorithm runs (also in parallel threads) share it without copying.
+        '''
+        if self.is_empty() or self is not self._state.head:
+            return CSRGraph.from_adjlist(self)
+        if self._state.snapshot is None:
+            self._state.snapshot = CSRGraph.from_adjlist(self)
+        return self._state.snapshot
 
-        return matrix
+    def iter_rows(self):
+        '''
+        Yields the rows of this adjacency list's adjacency matrix one at a time
+        in lexicographical order, so that only one row is held in memory.
+        '''
+        columns = self._columns()
+        n = len(columns)
+        node = self.head()
+        while not node.is_empty():
+            row = [inf] * n
+            edge = node.edges()
+            while not edge.is_empty():
+                if edge.dst() in columns:
+                    row[columns[edge.dst()]] = edge.weight()
+                edge = edge.tail()
+            yield row
+            node = node.tail()
 
 
 
@@ -320,6 +718,13 @@ class AdjacencyList:
     #           helper method
     #*******************************************
 
+    def _columns(self):
+        '''
+        Returns a dict that maps each node name to its lexicographical position,
+        i.e., to its row and column in the adjacency matrix.
+        '''
+        return { name: i for i, name in enumerate(self.list_nodes()) }
+
     def getListOfNames(self):
         '''
         Pre: Self is a node
@@ -363,11 +768,9 @@ class AdjacencyList:
         '''
         Returns Node if the node named `name` is a member.
         '''
-        if self.is_empty():
+        if not self.find_node(name):
             return 0
-        if name == self.head().name():
-            return self.head()
-        return self.tail().getNode(name)
+        return self._state.nodes[name]
 
     #****************************************
     #           /helper method
@@ -387,16 +790,181 @@ class AdjacencyList:
         '''
         Returns a list of edges in lexicographical order.
         '''
-        if self.head().is_empty():
-            return []
-        return self.head().edges().list(self.head().name()) +\
-            self.tail().list_edges()
+        edges, node = [], self.head()
+        while not node.is_empty():
+            edges += node.edges().list(node.name())
+            node = node.tail()
+        return edges
+
+class Batch:
+    '''
+    Node and edge operations on an adjacency list that are recorded without
+    keeping anything ordered, and then merged into the ordered chains with a
+    single sort-and-link pass when the batch ends.  If the with-block raises,
+    none of the operations are applied.
+
+    The operations have the same meaning as their AdjacencyList counterparts
+    applied one at a time, in order.
+    '''
+    def __init__(self, adjlist):
+        '''
+        Initializes an empty batch on top of the adjacency list head `adjlist`.
+        '''
+        self._head = adjlist
+        self._info = {} # name -> info of every node once the batch ends
+        self._fresh = set() # names that need a new node
+        self._out = {} # name -> {dst: weight} of nodes whose edges changed
+        self._old = {} # name -> {dst: weight} before the batch, for _out
+        self._preds = {} # name -> names that got an edge towards it
+        node = adjlist.head()
+        while not node.is_empty():
+            self._info[node.name()] = node.info()
+            node = node.tail()
+
+    def __enter__(self):
+        '''
+        Returns this batch, so that it can be named by `with ... as b`.
+        '''
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        '''
+        Merges the recorded operations, unless the with-block raised, in which
+        case they are dropped and the exception propagates.
+        '''
+        if kind is None:
+            self._merge()
+        return False
+
+    def head(self):
+        '''
+        Returns the adjacency list head, which is up to date once the batch
+        has ended.
+        '''
+        return self._head
+
+    def add_node(self, name, info=None):
+        '''
+        Records adding node `name`, or updating its info if it is a member.
+        '''
+        if name not in self._info:
+            self._fresh.add(name)
+            self._edges(name)
+        self._info[name] = info
+
+    def delete_node(self, name):
+        '''
+        Records deleting node `name` and its edges.  Edges towards it are kept,
+        as in AdjacencyList.delete_node().
+        '''
+        if name in self._info:
+            del self._info[name]
+            self._fresh.discard(name)
+            self._edges(name).clear()
+
+    def add_edge(self, src, dst, weight=1):
+        '''
+        Records adding (or updating the weight of) the edge from `src` to
+        `dst`.  Nothing is recorded unless both nodes are members.
+        '''
+        if src in self._info and dst in self._info:
+            self._edges(src)[dst] = weight
+            self._preds.setdefault(dst, set()).add(src)
+
+    def delete_edge(self, src, dst):
+        '''
+        Records deleting the edge from `src` to `dst` if it exists.
+        '''
+        if src in self._info:
+            self._edges(src).pop(dst, None)
+
+    def delete_edges(self, name):
+        '''
+        Records deleting all edges towards node `name`.  Only the nodes that
+        had or got such an edge are visited.
+        '''
+        srcs = set(self._preds.get(name, ()))
+        if not self._head.is_empty():
+            srcs |= self._head.head()._state.preds.get(name, set())
+        for src in srcs:
+            self.delete_edge(src, name)
+
+    def _edges(self, name):
+        '''
+        Returns the editable {dst: weight} edges of node `name`.
+        '''
+        if name not in self._out:
+            old = {}
+            if name not in self._fresh:
+                edge = self._head.getNode(name).edges()
+                while not edge.is_empty():
+                    old[edge.dst()] = edge.weight()
+                    edge = edge.tail()
+            self._old[name] = old
+            self._out[name] = {} if name in self._fresh else dict(old)
+        return self._out[name]
+
+    def _merge(self):
+        '''
+        Relinks the nodes in lexicographical order, rebuilds the edge chains of
+        the changed nodes, and brings the shared index and counters up to date.
+        '''
+        old_head, head, prev = self._head, None, None
+        state = None if old_head.is_empty() else old_head.head()._state
+        for name in sorted(self._info):
+            if state is None:
+                node = AdjacencyList(name)
+                state = node._state
+            elif name in self._fresh:
+                node = AdjacencyList._cell(name, None, state)
+            else:
+                node = state.nodes[name]
+            node._info = self._info[name]
+            if name in self._out:
+                node._set_edges(Edge._link(sorted(self._out[name].items())))
+            if head is None:
+                head = node
+            else:
+                prev.cons(node)
+            prev = node
+
+        if head is None:
+            self._head = AdjacencyList()
+            return
+        prev.cons(AdjacencyList._empty)
+
+        for name, old in self._old.items():
+            new = self._out[name] if name in self._info else {}
+            state.edges += len(new) - len(old)
+            for dst in old:
+                state.preds[dst].discard(name)
+            for dst in new:
+                state.preds.setdefault(dst, set()).add(name)
+        for name in [ name for name in state.nodes if name not in self._info ]:
+            state.remove(name)
+        node = head
+        while not node.is_empty():
+            if node.name() in state.ids:
+                state.nodes[node.name()] = node
+            else:
+                state.add(node)
+            node = node.tail()
+        state.head = head
+        state.changed()
+        self._head = head
 
 class Edge:
     '''
     A linked-list implementation of edges that originate from an implicit source
     node.  Each edge has a weight and goes towards a given destination node.
+
+    Like the nodes, edge cells are slot-based and share one immutable empty tail.
+    An edge chain does not know its node, so edits to a chain that is attached
+    to a node have to be passed on with AdjacencyList.set_edges(), which keeps
+    the counters, the incoming-edge index and the cached snapshot in sync.
     '''
+    __slots__ = ("_dst", "_weight", "_tail")
+
     def __init__(self, dst=None, weight=1):
         '''
         Initializes a new edge sequence.  It is considered empty if no head edge
@@ -405,7 +973,7 @@ class Edge:
         self._dst = dst # where is this edge's destination
         self._weight = weight # what is the weight of this edge
         if not self.head().is_empty():
-            self._tail= Edge() # empty edge tail
+            self._tail = Edge._empty # shared empty edge tail
 
     def is_empty(self):
         '''
@@ -429,6 +997,7 @@ class Edge:
         '''
         Returns the head of this sequence with a newly attached tail.
         '''
+        self._mutable()
         self._tail = tail
         return self.head()
 
@@ -446,90 +1015,148 @@ class Edge:
 
     def set_dst(self, dst):
         '''
-        Sets the destination of this edge to `dst`.
+        Sets the destination of this edge to `dst`.  The chain has to stay
+        lexicographically ordered, and if it is attached to a node, it has to
+        be reattached with AdjacencyList.set_edges().
 
         Returns an edge head.
         '''
+        self._mutable()
         self._dst = dst
         return self.head()
 
     def set_weight(self, weight):
         '''
-        Sets the weight of this edge to `weight`.
+        Sets the weight of this edge to `weight`.  If the chain is attached to
+        a node, reattach it with AdjacencyList.set_edges() so that the cached
+        snapshot is dropped.
 
         Returns an edge head.
         '''
+        self._mutable()
         self._weight = weight
         return self.head()
+
+    def _mutable(self):
+        '''
+        Raises TypeError if this edge is empty, since empty edges are shared and
+        must not be modified.
+        '''
+        if self.is_empty():
+            raise TypeError("an empty edge cannot be modified")
     
     ###
     # Operations
     ###
+    @staticmethod
+    def _link(pairs):
+        '''
+        Returns an edge head with the (dst, weight) pairs in `pairs`, linked
+        back to front so that the chain keeps their order.
+
+        Pre: `pairs` is lexicographically ordered on dst.
+        '''
+        chain = Edge._empty
+        for (dst, weight) in reversed(pairs):
+            edge = Edge(dst, weight)
+            edge._tail = chain
+            chain = edge
+        return chain
+
     def add(self, dst, weight=1):
         '''
         Adds a new edge towards `dst` in lexicographical order.  If such an
         edge exists already, the associated weight-field is updated instead.
 
-        Returns an edge head.
+        Returns an edge head.  If this chain belongs to a node, pass the head
+        on to AdjacencyList.set_edges(), which brings the counters up to date.
+        '''
+        return self._add(dst, weight)[0]
+
+    def _add(self, dst, weight):
+        '''
+        Adds a new (or updates an existing) edge towards `dst`.
+
+        Returns an edge head and 1 if an edge was added, 0 if it was updated.
         '''
         #When the edge head is empty
         if self.head().is_empty():
-            self.set_dst(dst)
-            self.set_weight(weight)
-            self._tail = Edge()
-            return self.head()
+            return Edge(dst, weight), 1
         #When edge already exists - Only update weight in existing edge.
         elif  self.dst() == dst:
             self.set_weight(weight)
-            return self.head()
+            return self.head(), 0
         
         #When dst is lower than existing edges
         elif dst < self.dst():
             newEdge = Edge(dst, weight)
             newEdge._tail = self.head()
-            return newEdge.head()
+            return newEdge.head(), 1
 
-        #When dst is higher than current edge go recursive
-        else:
-            return self.cons(self.tail().add(dst, weight))
+        #When dst is higher than current edge - Walk to the last lower edge
+        prev = self.head()
+        while not prev.tail().is_empty() and prev.tail().dst() < dst:
+            prev = prev.tail()
+
+        #When edge already exists further down - Only update weight
+        if not prev.tail().is_empty() and prev.tail().dst() == dst:
+            prev.tail().set_weight(weight)
+            return self.head(), 0
+
+        newEdge = Edge(dst, weight)
+        newEdge._tail = prev.tail()
+        prev.cons(newEdge)
+        return self.head(), 1
 
     def delete(self, dst):
         '''
         Deletes the edge that goes towards `dst` if it exists.
 
-        Returns an edge head.
+        Returns an edge head.  As with add(), reattach it to its node with
+        AdjacencyList.set_edges().
+        '''
+        return self._delete(dst)[0]
+
+    def _delete(self, dst):
         '''
+        Deletes the edge that goes towards `dst` if it exists.
 
+        Returns an edge head and 1 if an edge was deleted, 0 otherwise.
+        '''
         if self.is_empty():
-            return self.head()
+            return self.head(), 0
 
         if self.dst() == dst:
-            return self.tail()
-        
-        elif dst > self.dst():
-            return self.cons(self.tail().delete(dst))
+            return self.tail(), 1
 
-        return self.head()
+        prev = self.head()
+        while not prev.tail().is_empty() and prev.tail().dst() < dst:
+            prev = prev.tail()
+        if not prev.tail().is_empty() and prev.tail().dst() == dst:
+            prev.cons(prev.tail().tail())
+            return self.head(), 1
+        return self.head(), 0
 
     def find(self, dst):
         '''
         Returns True if there is an edge towards `dst` in this sequence.
         '''
-        if self.dst() is None:
-            return False
-        elif self.dst() == dst:
-            return True
-        else:
-            return self.tail().find(dst)
+        edge = self.head()
+        while not edge.is_empty():
+            if edge.dst() == dst:
+                return True
+            edge = edge.tail()
+        return False
 
     def cardinality(self):
         '''
         Returns the number of edges in this sequence.
         '''
-        if self.head().is_empty():
-            return 0
-        else: 
-            return (1 + self.tail().cardinality())
+        count, edge = 0, self.head()
+        while not edge.is_empty():
+            count += 1
+            edge = edge.tail()
+        return count
 
     def list(self, src):
         '''
@@ -537,9 +1164,14 @@ class Edge:
         goes to nodes A and B, the returned list would be:
             [ (src, A), (src, B) ]
         '''
-        if self.head().is_empty():
-            return []
-        return [(src, self.head().dst(), self.weight())] + self.tail().list(src)
+        edges, edge = [], self.head()
+        while not edge.is_empty():
+            edges.append((src, edge.dst(), edge.weight()))
+            edge = edge.tail()
+        return edges
+
+AdjacencyList._empty = AdjacencyList()
+Edge._empty = Edge()
 
 if __name__ == "__main__":
     log.critical("module contains no main method")
@@ -1,25 +1,51 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import logging
 
 log = logging.getLogger(__name__)
 
 from math import inf
-import copy #For use of copy/deepcopy
+from collections import OrderedDict
+from heapq import heapify, heappop, heappush
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from adjlist import AdjacencyList
+from csr import CSRGraph, weight_array
 from math import inf
 
-def warshall(adjlist):
+try:
+    import numpy as np
+except ImportError: # numpy is optional, it is only needed by the numpy engine
+    np = None
+
+def warshall(adjlist, engine="bitset", as_array=False):
     '''
     Returns an NxN matrix that contains the result of running Warshall's
     algorithm.
 
+    The "bitset" engine keeps every row as a Python int (see reachability()),
+    the "python" engine runs the plain triple loop over distances, and the
+    "numpy" engine updates the whole boolean matrix at once for every
+    intermediate node k.  If `as_array` is True, the result is returned as a
+    numpy array.
+
     Pre: adjlist is not empty.
     '''
+    check_engine(engine, as_array, ("bitset", "python", "numpy"))
+    if engine == "numpy":
+      matrix = warshall_numpy(as_csr(adjlist))
+      return matrix if as_array else matrix.tolist()
+    if engine == "bitset":
+      nodeSize = adjlist.node_cardinality()
+      matrix = [ bitset_to_list(row, nodeSize) for row in reachability(adjlist) ]
+      return np.array(matrix, dtype=bool) if as_array else matrix
+
     nodeSize = adjlist.node_cardinality() #Number of nodes
-    matrix = [[None]*nodeSize]*nodeSize #Matrix for end result
-    tmpMatrix = copy.deepcopy(adjlist.adjacency_matrix()) #Temporary matrix for calculations of algorithm
+    matrix = [None]*nodeSize #Matrix for end result
+    tmpMatrix = adjlist.adjacency_matrix() #Temporary matrix for calculations of algorithm, freshly built
 
     #Warshall
     for k in range(nodeSize):
@@ -33,21 +59,31 @@ def warshall(adjlist):
     for i in range(nodeSize):
       matrix[i] = [False if x == inf else True for x in tmpMatrix[i]]
 
-    return matrix
+    return np.array(matrix, dtype=bool) if as_array else matrix
 
 
-def floyd(adjlist):
+def floyd(adjlist, engine="python", as_array=False):
     '''
     Returns an NxN matrix that contains the result of running Floyd's algorithm.
 
+    The "python" engine runs the plain triple loop, the "numpy" engine
+    updates the whole distance matrix at once for every intermediate node k,
+    and the "blocked" engine is blocked_floyd() with its default settings.
+    If `as_array` is True, the result is returned as a float numpy array.
+
     Pre: adjlist is not empty.
     '''
+    check_engine(engine, as_array, ("python", "numpy", "blocked"))
+    if engine == "numpy":
+      graph = as_csr(adjlist)
+      matrix = floyd_numpy(graph)
+      return matrix if as_array else matrix_to_list(matrix, graph.weight_typecode())
+    if engine == "blocked":
+      matrix = blocked_floyd(adjlist)
+      return np.array(matrix, dtype=float) if as_array else matrix
 
     nodeSize = adjlist.node_cardinality()
-    matrix = adjlist.adjacency_matrix() #Initiates matrix with adjecency matrix
-
-    #Deepcopy as to make sure that no values are distorted
-    tmpMatrix = copy.deepcopy(matrix)
+    tmpMatrix = adjlist.adjacency_matrix() #Initiates matrix with adjecency matrix, freshly built so it can be updated in place
 
     for k in range(nodeSize):
       for i in range(nodeSize):
@@ -58,7 +94,416 @@ def floyd(adjlist):
           
 
 
-    return tmpMatrix
+    return np.array(tmpMatrix, dtype=float) if as_array else tmpMatrix
+
+def blocked_floyd(adjlist, block=64, workers=None):
+  '''
+  Returns the same NxN matrix as floyd(), computed on BxB blocks of a flat
+  matrix of doubles (B = `block`) so that the inner loops stay in cache.
+
+  For every diagonal block k, the block itself is updated first, then the
+  other blocks in its row and column, and then all remaining blocks.  The
+  blocks within the last two phases are independent, so with workers > 1
+  they are spread over a process pool that updates the matrix in shared
+  memory.
+
+  Pre: adjlist is not empty.
+  '''
+  graph = as_csr(adjlist)
+  n = graph.node_cardinality()
+  parallel = workers is not None and workers > 1 and n > block
+  shm = shared_memory.SharedMemory(create=True, size=8*n*n) if parallel else None
+  dist = shm.buf.cast("d") if parallel else array("d", bytes(8*n*n))
+  try:
+    offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+    for i in range(n):
+      dist[i*n:(i+1)*n] = array("d", [inf]) * n
+      for e in range(offsets[i], offsets[i+1]):
+        dist[i*n + targets[e]] = weights[e]
+      dist[i*n + i] = 0
+
+    nb = (n + block - 1) // block
+    pool = ProcessPoolExecutor(workers, initializer=attach_blocks, initargs=(shm.name, n, block)) if parallel else None
+    try:
+      for kb in range(nb):
+        relax_block(dist, n, block, (kb, kb, kb))
+        line = [ (kb, jb, kb) for jb in range(nb) if jb != kb ] + [ (ib, kb, kb) for ib in range(nb) if ib != kb ]
+        rest = [ (ib, jb, kb) for ib in range(nb) for jb in range(nb) if ib != kb and jb != kb ]
+        for phase in (line, rest):
+          if pool is None:
+            for task in phase:
+              relax_block(dist, n, block, task)
+          else:
+            list(pool.map(update_block, phase, chunksize=max(1, len(phase) // (4 * workers))))
+    finally:
+      if pool is not None:
+        pool.shutdown()
+
+    rows = [ dist[i*n:(i+1)*n].tolist() for i in range(n) ]
+  finally:
+    if parallel:
+      dist.release()
+      shm.close()
+      shm.unlink()
+  return matrix_to_list(rows, graph.weight_typecode())
+
+block_matrix = None # The shared flat distance matrix of a worker process, and its layout
+block_n, block_size = 0, 0
+block_memory = None # The worker's handle on the shared memory block, kept open
+
+def attach_blocks(name, n, block):
+  '''
+  Pre: name is the shared memory block of a flat NxN matrix of doubles
+  Post: update_block() works on that shared matrix in this worker process
+  '''
+  global block_memory, block_matrix, block_n, block_size
+  block_memory = shared_memory.SharedMemory(name=name) #Kept open for the life of the worker
+  block_matrix, block_n, block_size = block_memory.buf.cast("d"), n, block
+
+def update_block(task):
+  '''
+  Pre: attach_blocks has been called in this worker process
+  Post: Returns relax_block(block_matrix, block_n, block_size, task)
+  '''
+  return relax_block(block_matrix, block_n, block_size, task)
+
+def relax_block(dist, n, b, task):
+  '''
+  Pre: dist is a flat NxN matrix of doubles with BxB blocks (B = b), task is
+  (ib, jb, kb), and the blocks (ib, kb) and (kb, jb) are up to date
+  Post: Block (ib, jb) is relaxed over all intermediate nodes of block kb
+  '''
+  ib, jb, kb = task
+  i0, j0, k0 = ib*b, jb*b, kb*b
+  i1, j1, k1 = min(i0+b, n), min(j0+b, n), min(k0+b, n)
+
+  #Blocks in the row or column of kb are their own source of via or pivots
+  rows = [ dist[i*n+j0:i*n+j1].tolist() for i in range(i0, i1) ]
+  via = rows if jb == kb else [ dist[i*n+k0:i*n+k1].tolist() for i in range(i0, i1) ] #(ib, kb)
+  pivots = rows if ib == kb else [ dist[k*n+j0:k*n+j1].tolist() for k in range(k0, k1) ] #(kb, jb)
+  for k in range(k1 - k0):
+    pivot = pivots[k]
+    for r in range(i1 - i0):
+      d_ik = via[r][k]
+      if d_ik == inf:
+        continue
+      row = rows[r]
+      for j in range(j1 - j0):
+        if d_ik + pivot[j] < row[j]:
+          row[j] = d_ik + pivot[j]
+
+  for r, i in enumerate(range(i0, i1)):
+    dist[i*n+j0:i*n+j1] = array("d", rows[r])
+
+def reachability(adjlist):
+  '''
+  Returns the reflexive transitive closure of adjlist as N bitsets, where bit
+  j of the i:th Python int is set if the j:th node can be reached from the
+  i:th node.  Each step of Warshall's algorithm then becomes one bitwise or of
+  two whole rows: row_i |= row_k if bit k of row_i is set.
+
+  Pre: adjlist is an AdjacencyList or a CSRGraph
+  '''
+  graph = as_csr(adjlist)
+  offsets, targets = graph.offsets(), graph.targets()
+  n = graph.node_cardinality()
+
+  rows = [1 << i for i in range(n)] #Every node reaches itself
+  for u in range(n):
+    for i in range(offsets[u], offsets[u+1]):
+      rows[u] |= 1 << targets[i]
+
+  for k in range(n):
+    bit, row_k = 1 << k, rows[k]
+    for i in range(n):
+      if rows[i] & bit:
+        rows[i] |= row_k
+  return rows
+
+def bitset_to_list(row, n):
+  '''
+  Pre: row is a bitset of n bits
+  Post: Returns row as a list of n booleans, starting with bit 0
+  '''
+  return [ bit == "1" for bit in reversed(format(row, "b").zfill(n)) ]
+
+def check_engine(engine, as_array, engines):
+  '''
+  Pre: engine is the name of an all-pairs engine and engines are the valid names
+  Post: Raises ValueError for unknown engines and ImportError if numpy is needed but missing
+  '''
+  if engine not in engines:
+    raise ValueError("unknown engine '{}'".format(engine))
+  if (engine == "numpy" or as_array) and np is None:
+    raise ImportError("the numpy engine requires numpy")
+
+def numpy_matrix(graph):
+  '''
+  Pre: graph is a CSRGraph and numpy is available
+  Post: Returns the adjacency matrix of graph as an NxN float array with a zero diagonal
+  '''
+  n = graph.node_cardinality()
+  offsets = np.frombuffer(graph.offsets(), dtype=np.int64)
+  matrix = np.full((n, n), inf)
+  rows = np.repeat(np.arange(n), np.diff(offsets))
+  matrix[rows, np.frombuffer(graph.targets(), dtype=np.intc)] = graph.weights()
+  np.fill_diagonal(matrix, 0)
+  return matrix
+
+def floyd_numpy(graph):
+  '''
+  Pre: graph is a CSRGraph and numpy is available
+  Post: Returns the all-pairs shortest distances of graph as an NxN float array
+  '''
+  dist = numpy_matrix(graph)
+  for k in range(graph.node_cardinality()):
+    np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+  return dist
+
+def warshall_numpy(graph):
+  '''
+  Pre: graph is a CSRGraph and numpy is available
+  Post: Returns the reflexive transitive closure of graph as an NxN bool array
+  '''
+  reach = numpy_matrix(graph) != inf
+  for k in range(graph.node_cardinality()):
+    reach |= reach[:, k, None] & reach[None, k, :]
+  return reach
+
+def matrix_to_list(matrix, typecode):
+  '''
+  Pre: matrix is a float numpy array (or list of lists) and typecode is the weight typecode of its graph
+  Post: Returns matrix as a list of lists, with integer distances if all weights are integers
+  '''
+  rows = matrix if isinstance(matrix, list) else matrix.tolist()
+  if typecode == "d":
+    return rows
+  return [ [x if x == inf else int(x) for x in row] for row in rows ]
+
+class IncrementalAPSP:
+  '''
+  Keeps the result of floyd() up to date while an adjacency list is edited.
+
+  Edits go through this object, which applies them to the adjacency list and
+  then patches the distance matrix: inserting an edge or lowering its weight
+  costs O(N^2), while deletions and weight increases only rerun a
+  single-source search from the sources whose shortest paths may have used
+  the changed edge or node.
+
+  Rows and columns are indexed by the adjacency list's stable ids, so nodes
+  are added and deleted in place.  Rows and columns of free ids are all inf.
+  '''
+  def __init__(self, adjlist):
+    '''
+    Pre: adjlist is an AdjacencyList
+    Post: The distance matrix is computed from scratch
+    '''
+    self._adjlist = adjlist
+    n = len(adjlist.stable_names())
+    self._dist = [ [inf] * n for i in range(n) ]
+    self.rerun([ i for i, name in enumerate(adjlist.stable_names()) if name is not None ])
+
+  def adjlist(self):
+    '''
+    Returns the current adjacency list head.
+    '''
+    return self._adjlist
+
+  def matrix(self):
+    '''
+    Returns a copy of the distance matrix, i.e., what floyd() would return.
+    '''
+    order = [ self._adjlist.stable_id(name) for name in self._adjlist.list_nodes() ]
+    return [ [ self._dist[i][j] for j in order ] for i in order ]
+
+  def add_node(self, name, info=None):
+    '''
+    Adds (or updates the info of) node `name`.  A new node gets a row and a
+    column that only reach itself.
+    '''
+    new = not self._adjlist.find_node(name)
+    self._adjlist = self._adjlist.add_node(name, info)
+    if new:
+      i = self._adjlist.stable_id(name)
+      while len(self._dist) <= i:
+        for row in self._dist:
+          row.append(inf)
+        self._dist.append([inf] * (len(self._dist) + 1))
+      self._dist[i][i] = 0
+
+  def delete_node(self, name):
+    '''
+    Deletes node `name` and all edges towards it.
+    '''
+    if not self._adjlist.find_node(name):
+      return
+    self.delete_edges(name)
+    i = self._adjlist.stable_id(name)
+    self._adjlist = self._adjlist.delete_node(name)
+    self._dist[i] = [inf] * len(self._dist)
+    for row in self._dist:
+      row[i] = inf
+
+  def add_edge(self, src, dst, weight=1):
+    '''
+    Adds or updates the edge from node `src` to node `dst`.
+    '''
+    if not (self._adjlist.find_node(src) and self._adjlist.find_node(dst)):
+      return
+    old = edge_weight(self._adjlist, src, dst)
+    self._adjlist = self._adjlist.add_edge(src, dst, weight)
+    if old is not None and weight > old:
+      self.rerun(self.users(src, dst, old))
+      return
+
+    u, v = self._adjlist.stable_id(src), self._adjlist.stable_id(dst)
+    to_u = [ row[u] for row in self._dist ]
+    from_v = list(self._dist[v])
+    for i, row in enumerate(self._dist):
+      if to_u[i] + weight < row[v]:
+        via = to_u[i] + weight
+        for j in range(len(row)):
+          if via + from_v[j] < row[j]:
+            row[j] = via + from_v[j]
+
+  def delete_edge(self, src, dst):
+    '''
+    Deletes the edge from node `src` to node `dst` if it exists.
+    '''
+    old = edge_weight(self._adjlist, src, dst)
+    if old is None:
+      return
+    sources = self.users(src, dst, old)
+    self._adjlist = self._adjlist.delete_edge(src, dst)
+    self.rerun(sources)
+
+  def delete_edges(self, name):
+    '''
+    Deletes all edges towards node `name`.
+    '''
+    if not self._adjlist.find_node(name):
+      self._adjlist = self._adjlist.delete_edges(name)
+      return
+    v = self._adjlist.stable_id(name)
+    sources = [ i for i, row in enumerate(self._dist) if i != v and row[v] != inf ]
+    self._adjlist = self._adjlist.delete_edges(name)
+    self.rerun(sources)
+
+  def users(self, src, dst, weight):
+    '''
+    Returns the rows whose shortest path to `dst` may use the edge from `src`
+    with weight `weight`.  No other row can change if that edge is removed.
+
+    Float sums are rounded, so a path through the edge counts as shortest if
+    it is within a small relative tolerance of the stored distance.
+    '''
+    u, v = self._adjlist.stable_id(src), self._adjlist.stable_id(dst)
+    return [ i for i, row in enumerate(self._dist)
+             if row[u] != inf and row[u] + weight <= row[v] + 1e-9 * (1 + abs(row[v])) ]
+
+  def rerun(self, sources):
+    '''
+    Recomputes the rows in `sources` with one single-source search each.
+    '''
+    if len(sources) == 0:
+      return
+    graph = as_csr(self._adjlist)
+    ids = [ self._adjlist.stable_id(name) for name in graph.names() ] # CSR id -> stable id
+    for i in sources:
+      row = [inf] * len(self._dist)
+      for v, d in enumerate(distances_from(graph, graph.node_id(self._adjlist.stable_name(i)))):
+        row[ids[v]] = d
+      self._dist[i] = row
+
+def edge_weight(adjlist, src, dst):
+  '''
+  Pre: adjlist is an AdjacencyList
+  Post: Returns the weight of the edge from src to dst, or None if there is no such edge
+  '''
+  node = adjlist.getNode(src)
+  edge = node.edges() if node else None
+  while edge is not None and not edge.is_empty():
+    if edge.dst() == dst:
+      return edge.weight()
+    edge = edge.tail()
+  return None
+
+class ResultCache:
+  '''
+  A least-recently-used cache of algorithm results, keyed by the algorithm,
+  its arguments and the version stamp of the graph.  Since every mutation
+  bumps the version, a cached result is only returned while the graph is
+  unchanged.  Entries are evicted once the results hold more than `maxsize`
+  values in total, e.g., an NxN matrix holds N*N values.
+  '''
+  def __init__(self, maxsize=10**7):
+    self._maxsize = maxsize
+    self._entries = OrderedDict() # key -> (result, size), least recent first
+    self._size = 0
+    self.hits = 0
+    self.misses = 0
+
+  def call(self, algorithm, adjlist, *args, **kwargs):
+    '''
+    Returns a copy of algorithm(adjlist, *args, **kwargs), running it only
+    if there is no cached result for the current version of adjlist.
+
+    Pre: args and kwargs are hashable.
+    '''
+    key = (algorithm, adjlist.version(), args, tuple(sorted(kwargs.items())))
+    if key in self._entries:
+      self.hits += 1
+      self._entries.move_to_end(key)
+      return copy_result(self._entries[key][0])
+
+    self.misses += 1
+    result = algorithm(adjlist, *args, **kwargs)
+    size = result_size(result)
+    if size <= self._maxsize:
+      self._entries[key] = (result, size)
+      self._size += size
+      while self._size > self._maxsize:
+        (old, old_size) = self._entries.popitem(last=False)[1]
+        self._size -= old_size
+    return copy_result(result)
+
+  def clear(self):
+    '''
+    Drops all cached results and resets the hit and miss counters.
+    '''
+    self._entries.clear()
+    self._size = self.hits = self.misses = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+result_cache = ResultCache() # Shared cache, e.g. result_cache.call(floyd, adjlist)
+
+def copy_result(result):
+  '''
+  Pre: result was returned by one of the algorithms
+  Post: Returns a copy that the caller can modify without touching the cache
+  '''
+  if isinstance(result, tuple):
+    return tuple(copy_result(part) for part in result)
+  if isinstance(result, dict):
+    return { key: copy_result(value) for key, value in result.items() }
+  if isinstance(result, list):
+    return [ copy_result(x) if isinstance(x, (list, tuple)) else x for x in result ]
+  if hasattr(result, "copy"): #numpy arrays
+    return result.copy()
+  return result
+
+def result_size(result):
+  '''
+  Pre: result was returned by one of the algorithms
+  Post: Returns the number of values that result holds
+  '''
+  if isinstance(result, dict):
+    return sum(result_size(value) for value in result.values())
+  if isinstance(result, (list, tuple)):
+    return sum(result_size(x) if isinstance(x, (list, tuple, dict)) else 1 for x in result)
+  return getattr(result, "size", 1)
 
 def dijkstra(adjlist, start_node):
     '''
@@ -69,6 +514,8 @@ def dijkstra(adjlist, start_node):
     path originated from.
 
     If the index i refers to the start node, set the associated values to None.
+    Like the start node, any node at distance 0, e.g., one that is reached
+    over zero-weight edges only, gets None in both lists.
 
     Pre: start_node is a member of adjlist.
 
@@ -86,65 +533,416 @@ def dijkstra(adjlist, start_node):
     d: [ None, 1, 2]
     e: [ None, 'a', 'a' ]
     '''
-    d = [None] * adjlist.node_cardinality()
-    e = [None] * adjlist.node_cardinality()
-
-    q = []# tmp queue to sort and pick node for loop
-    s = []# Values that pop from q are added here to contain order of nodes and replicated for d and e
+    graph = as_csr(adjlist)
+    offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+    n = graph.node_cardinality()
+    start = graph.node_id(start_node)
 
-    #Initates values
-    loadAndInit(adjlist, q, start_node)
+    prev = [None] * n # Node name that each node's path originated from
+    q = NodeQueue(n, start) # Queue of unvisited nodes, keyed by tentative distance
 
     #MAIN LOOP
     while len(q) != 0:
-      q.sort(key=lambda node: node.info()[0])
-      u = q.pop(0)
-
-      s.append(u)
-      #Fetches all edges from current node - Tries to relax them if v has not been visited
-      for edge in u.getListOfEdges(): #Gets all edges and loops through them with help of DST
-        v = adjlist.getNode(edge.dst())    #Doesn't really improve bigO... but searches and finds correct node from graph
-        #Relaxes edge if v is not visited
-        if v in q: 
-          relax(v, u, edge.weight()) #Alters v.key value if actual weight from u to v is lower
-
-
-    #Based on s array, sets values on correct spot in d and e arrays.
-    s.sort(key=lambda node: node.name())
-    for index, node in enumerate(s):
-      if node.info()[0] == 0: #Special case for startnode
-        d[index] = None
-        e[index] = None
-      else:
-        d[index] = node.info()[0]
-        e[index] = node.info()[1]
+      u = q.pop()
+
+      #Tries to relax all edges from current node if v has not been visited
+      for i in range(offsets[u], offsets[u+1]):
+        v = targets[i]
+        if v in q:
+          relax(q, prev, v, u, weights[i], graph.node_name(u))
 
+    d = [None if q.key(v) == 0 else q.key(v) for v in range(n)] #Key 0 marks the start node
+    e = [None if q.key(v) == 0 else prev[v] for v in range(n)]
     return d, e
 
-#Relax function that compares an edge dst info with (src info + weight) - Swaps values if src combination is lower
-def relax(v, u, weight):
+#Relax function that compares an edge dst key with (src key + weight) - Swaps values if src combination is lower
+def relax(q, prev, v, u, weight, name):
   '''
-  Pre: v and u are nodes and weight is an integer
-  Post: Alters info of v if (u.info + weight) is lower can current v.info
+  Pre: q is a NodeQueue, prev is indexed by node id, v and u are node ids and weight is an integer
+  Post: Lowers the key of v and alters prev[v] if (key of u + weight) is lower than current key of v
   '''
-  if v.info()[0] > u.info()[0] + weight:
-    v.set_info([(u.info()[0] + weight), u.name()])
+  if q.key(v) > q.key(u) + weight:
+    q.decrease(v, q.key(u) + weight)
+    prev[v] = name
 
+class NodeQueue:
+  '''
+  A binary-heap priority queue of node ids with lazy deletion.
 
-#Initation function for algorithms that use an array of nodes
+  Ties are broken exactly like stable-sorting the lexicographically ordered
+  list of unvisited nodes by key before every pop would: a node whose key was
+  lowered earlier goes first, and nodes lowered by the same pop are ordered by
+  their previous keys.  This is why every heap entry links to the entry that
+  it replaced.
+  '''
+  def __init__(self, n, start):
+    '''
+    Pre: n is the number of nodes and start is the id of the start node
+    Post: All nodes are queued with key inf, except start which has key 0
+    '''
+    self._entries = [ (inf, -1, v, v) for v in range(n) ] # key, pops, previous entry, node id
+    self._entries[start] = (0, -1, start, start)
+    self._heap = list(self._entries)
+    heapify(self._heap)
+    self._queued = [True] * n
+    self._size = n
+    self._pops = 0
 
-def loadAndInit(adjNode, targetList, start_node):
+  def __len__(self):
+    return self._size
+
+  def __contains__(self, v):
+    return self._queued[v]
+
+  def key(self, v):
+    '''
+    Returns the current key of node id v, which is kept after v is popped.
+    '''
+    return self._entries[v][0]
+
+  def pop(self):
+    '''
+    Pre: the queue is not empty
+    Post: Removes and returns the node id with the smallest key
+    '''
+    while True:
+      entry = heappop(self._heap)
+      v = entry[3]
+      if self._queued[v] and entry is self._entries[v]:
+        break
+    self._queued[v] = False
+    self._size -= 1
+    self._pops += 1
+    return v
+
+  def decrease(self, v, key):
+    '''
+    Pre: v is queued and key is lower than its current key
+    Post: The key of v is set to key
+    '''
+    entry = (key, self._pops, self._entries[v], v)
+    self._entries[v] = entry
+    heappush(self._heap, entry)
+
+def as_csr(adjlist):
+  '''
+  Pre: adjlist is an AdjacencyList or a CSRGraph
+  Post: Returns adjlist as a CSRGraph, algorithms work on its dense node ids
+
+  All working state of the algorithms is kept in local lists indexed by these
+  ids, and the snapshot of an AdjacencyList is shared until it changes, so any
+  number of threads can run them on the same graph at once.
+  '''
+  if isinstance(adjlist, CSRGraph):
+    return adjlist
+  return adjlist.snapshot()
+
+def dijkstra_many(adjlist, start_nodes, workers=None):
+  '''
+  Returns a dict that maps every node name in start_nodes to the (d, e) result
+  of dijkstra(adjlist, start_node).
+
+  The runs are spread over a pool of `workers` processes (default: one per
+  core).  The graph is converted to a CSRGraph once and handed to each worker
+  when it starts, so tasks only carry a start node name.
+
+  Pre: every node in start_nodes is a member of adjlist.
+  '''
+  graph = as_csr(adjlist)
+  start_nodes = list(start_nodes)
+  workers = workers or os.cpu_count() or 1
+  if workers == 1 or len(start_nodes) <= 1:
+    return { start: dijkstra(graph, start) for start in start_nodes }
+
+  with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(graph,)) as pool:
+    chunksize = max(1, len(start_nodes) // (4 * workers))
+    results = pool.map(dijkstra_worker, start_nodes, chunksize=chunksize)
+    return dict(zip(start_nodes, results))
+
+worker_graph = None # The graph of a worker process, set by init_worker
+
+def init_worker(graph):
+  '''
+  Pre: graph is a CSRGraph
+  Post: graph is stored for the tasks that run in this worker process
+  '''
+  global worker_graph
+  worker_graph = graph
+
+def dijkstra_worker(start_node):
+  '''
+  Pre: init_worker has been called in this process
+  Post: Returns dijkstra(worker_graph, start_node)
+  '''
+  return dijkstra(worker_graph, start_node)
+
+def distances_worker(s):
+  '''
+  Pre: init_worker has been called in this process
+  Post: Returns distances_from(worker_graph, s)
+  '''
+  return distances_from(worker_graph, s)
+
+def johnson(adjlist, workers=None):
+  '''
+  Returns the same NxN matrix as floyd(), computed with Johnson's algorithm:
+  Bellman-Ford finds a potential h that makes every edge weight
+  w(u,v) + h(u) - h(v) non-negative, and then one heap-based Dijkstra run per
+  source gives each row.  This is O(N*E log N), which beats floyd() on
+  sparse graphs.  By default the sources run in this process; with
+  workers > 1, they are spread over a process pool, like blocked_floyd().
+
+  Raises ValueError if the graph has a negative cycle.
+
+  Pre: adjlist is not empty.
+  '''
+  graph = as_csr(adjlist)
+  n = graph.node_cardinality()
+  h = potential(graph)
+  reweighted = graph
+  if any(x != 0 for x in h):
+    offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+    reweighted = CSRGraph(graph.names(), offsets, targets, weight_array(
+      [ weights[i] + h[u] - h[targets[i]] for u in range(n) for i in range(offsets[u], offsets[u+1]) ]))
+
+  if workers is None or workers <= 1 or n <= 1:
+    rows = [ distances_from(reweighted, s) for s in range(n) ]
+  else:
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(reweighted,)) as pool:
+      rows = list(pool.map(distances_worker, range(n), chunksize=max(1, n // (4 * workers))))
+
+  for s, row in enumerate(rows):
+    for v in range(n):
+      if row[v] != inf:
+        row[v] += h[v] - h[s]
+  return rows
+
+def potential(graph):
+  '''
+  Pre: graph is a CSRGraph
+  Post: Returns Bellman-Ford distances h from a virtual source with a 0-weight edge to every node
+  '''
+  offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+  n = graph.node_cardinality()
+  h = [0] * n
+  for rounds in range(n + 1):
+    changed = False
+    for u in range(n):
+      for i in range(offsets[u], offsets[u+1]):
+        if h[u] + weights[i] < h[targets[i]]:
+          h[targets[i]] = h[u] + weights[i]
+          changed = True
+    if not changed:
+      return h
+  raise ValueError("graph has a negative cycle")
+
+def shortest_path(adjlist, src, dst, bidirectional=False):
+  '''
+  Returns the minimal cost to go from node `src` to node `dst` together with
+  the node names along that path, or (inf, []) if dst can't be reached.
+  Unlike dijkstra(), the search stops as soon as dst has been settled.
+
+  If `bidirectional` is True, a second search runs backwards from dst over
+  the reversed edges (see CSRGraph.reverse()) until the two searches meet.
+
+  Pre: src and dst are members of adjlist.
+  '''
+  graph = as_csr(adjlist)
+  s, t = graph.node_id(src), graph.node_id(dst)
+  if bidirectional:
+    dist, path = bidirectional_search(graph, s, t)
+  else:
+    dist, path = forward_search(graph, s, t)
+  return dist, [ graph.node_name(v) for v in path ]
+
+def forward_search(graph, s, t):
+  '''
+  Pre: graph is a CSRGraph, s and t are node ids
+  Post: Returns the distance from s to t and the path as node ids, or (inf, [])
+  '''
+  offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+  dist, prev, settled = {s: 0}, {s: None}, set()
+  heap = [(0, s)]
+  while len(heap) != 0:
+    d, u = heappop(heap)
+    if u in settled:
+      continue
+    if u == t:
+      return d, trace(prev, t)
+    settled.add(u)
+    for i in range(offsets[u], offsets[u+1]):
+      v, nd = targets[i], d + weights[i]
+      if nd < dist.get(v, inf):
+        dist[v], prev[v] = nd, u
+        heappush(heap, (nd, v))
+  return inf, []
+
+def bidirectional_search(graph, s, t):
+  '''
+  Pre: graph is a CSRGraph, s and t are node ids
+  Post: Returns the distance from s to t and the path as node ids, or (inf, [])
+  '''
+  graphs = (graph, graph.reverse()) #Forward and backward search
+  dist, prev = ({s: 0}, {t: 0}), ({s: None}, {t: None})
+  settled, heaps = (set(), set()), ([(0, s)], [(0, t)])
+  best, meet = (0, s) if s == t else (inf, None)
+
+  while len(heaps[0]) != 0 and len(heaps[1]) != 0:
+    if heaps[0][0][0] + heaps[1][0][0] >= best:
+      break
+    side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+    d, u = heappop(heaps[side])
+    if u in settled[side]:
+      continue
+    settled[side].add(u)
+
+    offsets, targets, weights = graphs[side].offsets(), graphs[side].targets(), graphs[side].weights()
+    for i in range(offsets[u], offsets[u+1]):
+      v, nd = targets[i], d + weights[i]
+      if nd < dist[side].get(v, inf):
+        dist[side][v], prev[side][v] = nd, u
+        heappush(heaps[side], (nd, v))
+      if v in dist[1-side] and dist[side][v] + dist[1-side][v] < best:
+        best, meet = dist[side][v] + dist[1-side][v], v
+
+  if meet is None:
+    return inf, []
+  path = trace(prev[0], meet)
+  v = prev[1][meet]
+  while v is not None:
+    path.append(v)
+    v = prev[1][v]
+  return best, path
+
+def trace(prev, v):
+  '''
+  Pre: prev maps every reached node id to the node id it was reached from
+  Post: Returns the node ids on the path that ends in v, starting at the root
+  '''
+  path = []
+  while v is not None:
+    path.append(v)
+    v = prev[v]
+  path.reverse()
+  return path
+
+def astar(adjlist, src, dst, heuristic=None, stats=None):
+  '''
+  Returns the minimal cost to go from node `src` to node `dst` together with
+  the node names along that path, or (inf, []) if dst can't be reached.
+
+  The search is guided by `heuristic(node, dst)`, which must never
+  overestimate the cost from node to dst, e.g., the heuristic returned by
+  landmarks().  Without a heuristic, this is Dijkstra's algorithm with an
+  early exit.  If `stats` is a dict, stats["expanded"] is set to the number of
+  node expansions.
+
+  Pre: src and dst are members of adjlist.
+  '''
+  graph = as_csr(adjlist)
+  offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+  s, t = graph.node_id(src), graph.node_id(dst)
+  h = {} #Heuristic value of every reached node id
+  def estimate(v):
+    if v not in h:
+      h[v] = 0 if heuristic is None else heuristic(graph.node_name(v), dst)
+    return h[v]
+
+  dist, prev, expanded = {s: 0}, {s: None}, 0
+  heap = [(estimate(s), 0, s)]
+  while len(heap) != 0:
+    f, d, u = heappop(heap)
+    if d > dist[u]: #A shorter path to u has been found since
+      continue
+    if u == t:
+      break
+    expanded += 1
+    for i in range(offsets[u], offsets[u+1]):
+      v, nd = targets[i], d + weights[i]
+      if nd < dist.get(v, inf):
+        dist[v], prev[v] = nd, u
+        heappush(heap, (nd + estimate(v), nd, v))
+
+  if stats is not None:
+    stats["expanded"] = expanded
+  if t not in dist:
+    return inf, []
+  return dist[t], [ graph.node_name(v) for v in trace(prev, t) ]
+
+class Landmarks:
+  '''
+  An ALT heuristic for astar(): with the exact distances from and to a few
+  landmark nodes, the triangle inequality gives a lower bound on the cost
+  from any node to any other node.
   '''
-  Pre: adjNode = root to graph, targetList = list of nodes, start_node = value of startnode
-  Post: targetList is an array of all nodes in graph, start_node in array has special value of 0 instead of inf for startnode detection
-  Post: All nodes in array have info updates with correct values
+  def __init__(self, graph, landmarks):
+    '''
+    Pre: graph is a CSRGraph and landmarks is a list of its node ids
+    Post: Runs two single-source searches per landmark, one over reversed edges
+    '''
+    self._graph = graph
+    self._landmarks = [ graph.node_name(v) for v in landmarks ]
+    self._from = [ distances_from(graph, v) for v in landmarks ] #d(L, v)
+    self._to = [ distances_from(graph.reverse(), v) for v in landmarks ] #d(v, L)
+
+  def landmarks(self):
+    '''
+    Returns the landmark node names.
+    '''
+    return self._landmarks
+
+  def __call__(self, node, dst):
+    '''
+    Returns a lower bound on the cost from node `node` to node `dst`.
+    '''
+    u, t = self._graph.node_id(node), self._graph.node_id(dst)
+    bound = 0
+    for d_from, d_to in zip(self._from, self._to):
+      if d_from[t] != inf and d_from[u] != inf:
+        bound = max(bound, d_from[t] - d_from[u])
+      if d_to[u] != inf and d_to[t] != inf:
+        bound = max(bound, d_to[u] - d_to[t])
+    return bound
+
+def landmarks(adjlist, count=4):
   '''
-  targetList.extend(adjNode.getListOfNodes())
-  for node in (targetList):
-    if node.name() == start_node:
-      node.set_info([0, None, None])
-    else:
-      node.set_info([inf, None, None])
+  Returns a Landmarks heuristic with up to `count` landmarks.  The first
+  landmark is the first node, and every next one is the node that is
+  farthest away from the landmarks chosen so far.
+
+  Pre: adjlist is not empty.
+  '''
+  graph = as_csr(adjlist)
+  n = graph.node_cardinality()
+  chosen, nearest = [0], distances_from(graph, 0)
+  while len(chosen) < min(count, n):
+    far = max((v for v in range(n) if v not in chosen and nearest[v] != inf),
+              key=lambda v: nearest[v], default=None)
+    if far is None: #Nothing else is reachable, pick the next unchosen node
+      far = next(v for v in range(n) if v not in chosen)
+    chosen.append(far)
+    nearest = [ min(a, b) for a, b in zip(nearest, distances_from(graph, far)) ]
+  return Landmarks(graph, chosen)
+
+def distances_from(graph, s):
+  '''
+  Pre: graph is a CSRGraph and s is a node id
+  Post: Returns the minimal cost from s to every node id, inf if unreachable
+  '''
+  offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+  dist = [inf] * graph.node_cardinality()
+  dist[s] = 0
+  heap = [(0, s)]
+  while len(heap) != 0:
+    d, u = heappop(heap)
+    if d > dist[u]:
+      continue
+    for i in range(offsets[u], offsets[u+1]):
+      v, nd = targets[i], d + weights[i]
+      if nd < dist[v]:
+        dist[v] = nd
+        heappush(heap, (nd, v))
+  return dist
 
 def prim(adjlist, start_node):
     '''
@@ -155,6 +953,8 @@ def prim(adjlist, start_node):
     cheapest edge orignated from. 
 
     If the index i refers to the start node, set the associated values to None.
+    Like the start node, any node whose cheapest edge has weight 0 gets None
+    in both lists.
 
     Pre: adjlist is setup as an undirected graph and start_node is a member.
 
@@ -172,32 +972,220 @@ def prim(adjlist, start_node):
     l: [ None, 1, 1]
     c: [ None, 'a', 'b' ]
     '''
-    l = [None] * adjlist.node_cardinality() #Lowcost, weights
-    c = [None] * adjlist.node_cardinality() #Closest, parents
-    q = [] #Tmpqueue to hold nodes
+    graph = as_csr(adjlist)
+    offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+    n = graph.node_cardinality()
+    start = graph.node_id(start_node)
 
-    #Inits all arrays and values with None, 0 and Inf etc
-    loadAndInit(adjlist, q, start_node)
+    closest = [None] * n #Closest, parents
+    q = NodeQueue(n, start) #Queue to hold node ids, keyed by lowcost
 
     while len(q) != 0:
-      q.sort(key=lambda node: node.info()[0]) #Sorts to pop the node with the smalles key
-      u = q.pop(0)
-      for edge in (u.getListOfEdges()):
-        dstNode = adjlist.getNode(edge.dst()) #Gets real node based on edge.dst
-        if dstNode in q and edge.weight() < dstNode.info()[0]:
-          dstNode.set_info([edge.weight(), u.name()]) #Sets new values if dstNode is contained in q and the key is lager than weight
-
-    #Adds values from node.info to correct place in l and c
-    for index, node in enumerate(adjlist.getListOfNodes()):
-      if node.info()[0] == 0:
-        l[index] = None
-        c[index] = None
-      else:
-        l[index] = node.info()[0]
-        c[index] = node.info()[1]
+      u = q.pop() #Pops the node with the smalles key
+      for i in range(offsets[u], offsets[u+1]):
+        v = targets[i]
+        if v in q and weights[i] < q.key(v):
+          q.decrease(v, weights[i]) #Sets new values if v is contained in q and the key is lager than weight
+          closest[v] = graph.node_name(u)
 
+    l = [None if q.key(v) == 0 else q.key(v) for v in range(n)] #Key 0 marks the start node
+    c = [None if q.key(v) == 0 else closest[v] for v in range(n)]
     return l, c
 
+def kruskal(adjlist, start_node=None):
+    '''
+    Returns the result of running Kruskal's algorithm as three lists:
+    1) lowcost l and 2) closest c, just like prim(), and 3) forest f: the
+    edges (src, dst, weight) of a minimum spanning forest in the order that
+    they were picked, i.e., one minimum spanning tree per component.
+
+    The forest is rooted at `start_node` (default: the first node), whose
+    values are None.  The first node of every other component becomes the
+    root of its tree with lowcost inf, like the unreachable nodes of prim().
+    An empty graph gives three empty lists.
+
+    Pre: adjlist is setup as an undirected graph and start_node is a member.
+    '''
+    graph = as_csr(adjlist)
+    offsets, targets, weights = graph.offsets(), graph.targets(), graph.weights()
+    n = graph.node_cardinality()
+    if n == 0:
+      return [], [], []
+    start = 0 if start_node is None else graph.node_id(start_node)
+
+    #Picks the cheapest edges that join two different trees
+    edges = sorted((weights[i], u, targets[i]) for u in range(n) for i in range(offsets[u], offsets[u+1]))
+    trees, forest = DisjointSet(n), []
+    neighbours = [[] for v in range(n)]
+    for (weight, u, v) in edges:
+      if trees.union(u, v):
+        forest.append((graph.node_name(u), graph.node_name(v), weight))
+        neighbours[u].append((v, weight))
+        neighbours[v].append((u, weight))
+
+    #Orients every tree away from its root to fill in lowcost and closest
+    l, c, seen = [inf] * n, [None] * n, [False] * n
+    for root in [start] + list(range(n)):
+      if seen[root]:
+        continue
+      seen[root], stack = True, [root]
+      while len(stack) != 0:
+        u = stack.pop()
+        for (v, weight) in neighbours[u]:
+          if not seen[v]:
+            seen[v], l[v], c[v] = True, weight, graph.node_name(u)
+            stack.append(v)
+    l[start] = None
+    return l, c, forest
+
+class DisjointSet:
+  '''
+  A union-find structure over the ids 0..n-1 with path compression and union
+  by rank, so that any sequence of operations runs in nearly linear time.
+  '''
+  def __init__(self, n):
+    self._parent = list(range(n))
+    self._rank = [0] * n
+
+  def find(self, v):
+    '''
+    Returns the representative id of the set that contains v.
+    '''
+    root = v
+    while self._parent[root] != root:
+      root = self._parent[root]
+    while self._parent[v] != root: #Path compression
+      self._parent[v], v = root, self._parent[v]
+    return root
+
+  def union(self, u, v):
+    '''
+    Merges the sets that contain u and v.  Returns False if they were the same.
+    '''
+    u, v = self.find(u), self.find(v)
+    if u == v:
+      return False
+    if self._rank[u] < self._rank[v]:
+      u, v = v, u
+    self._parent[v] = u
+    if self._rank[u] == self._rank[v]:
+      self._rank[u] += 1
+    return True
+
+def strongly_connected(adjlist):
+  '''
+  Returns the strongly connected components of adjlist as lists of node
+  names.  Names are lexicographically ordered within each component, and the
+  components are ordered by their first name.
+
+  This is Tarjan's algorithm with an explicit stack, so it runs in O(N+E)
+  without recursion.
+  '''
+  graph = as_csr(adjlist)
+  offsets, targets = graph.offsets(), graph.targets()
+  n = graph.node_cardinality()
+  index, low = [None] * n, [0] * n #Discovery order and lowest reachable discovery order
+  on_stack, stack, components, count = [False] * n, [], [], 0
+
+  for root in range(n):
+    if index[root] is not None:
+      continue
+    index[root] = low[root] = count
+    count += 1
+    stack.append(root)
+    on_stack[root] = True
+    work = [(root, offsets[root])] #(node, next edge to follow)
+    while len(work) != 0:
+      u, i = work[-1]
+      if i < offsets[u+1]:
+        work[-1] = (u, i+1)
+        v = targets[i]
+        if index[v] is None:
+          index[v] = low[v] = count
+          count += 1
+          stack.append(v)
+          on_stack[v] = True
+          work.append((v, offsets[v]))
+        elif on_stack[v]:
+          low[u] = min(low[u], index[v])
+        continue
+
+      work.pop()
+      if len(work) != 0:
+        low[work[-1][0]] = min(low[work[-1][0]], low[u])
+      if low[u] == index[u]: #u is the root of a component, pop it off the stack
+        component = []
+        while True:
+          v = stack.pop()
+          on_stack[v] = False
+          component.append(v)
+          if v == u:
+            break
+        components.append(sorted(component))
+
+  components.sort()
+  return [ [graph.node_name(v) for v in component] for component in components ]
+
+def weakly_connected(adjlist):
+  '''
+  Returns the weakly connected components of adjlist, i.e., the components
+  when edge directions are ignored, ordered like strongly_connected().  For
+  an undirected graph these are its connected components.  Runs in O(N+E)
+  with a DisjointSet.
+  '''
+  graph = as_csr(adjlist)
+  offsets, targets = graph.offsets(), graph.targets()
+  n = graph.node_cardinality()
+  trees = DisjointSet(n)
+  for u in range(n):
+    for i in range(offsets[u], offsets[u+1]):
+      trees.union(u, targets[i])
+
+  members = {} #Representative -> ids in ascending order
+  for v in range(n):
+    members.setdefault(trees.find(v), []).append(v)
+  components = sorted(members.values())
+  return [ [graph.node_name(v) for v in component] for component in components ]
+
+def map_components(algorithm, adjlist, *args, strong=False, start=False, workers=None):
+  '''
+  Returns a list of (names, result) pairs, one per weakly (or, if `strong` is
+  True, strongly) connected component of adjlist, where names are the
+  component's node names and result is algorithm(subgraph, *args) on the
+  CSRGraph of that component.  If `start` is True, the component's first node
+  is passed right after the subgraph, e.g., for prim() or dijkstra():
+
+      map_components(prim, adjlist, start=True)
+
+  The components are spread over a pool of `workers` processes (default:
+  one per core), largest first.  `algorithm` has to be a module-level
+  function so that it can be sent to the workers.
+  '''
+  graph = as_csr(adjlist)
+  components = strongly_connected(graph) if strong else weakly_connected(graph)
+  tasks = []
+  for names in components:
+    sub = graph.subgraph([ graph.node_id(name) for name in names ])
+    tasks.append((algorithm, sub, ((names[0],) if start else ()) + args))
+
+  workers = workers or os.cpu_count() or 1
+  if workers == 1 or len(tasks) <= 1:
+    return [ (names, component_worker(task)) for names, task in zip(components, tasks) ]
+
+  order = sorted(range(len(tasks)), key=lambda c: -len(components[c]))
+  results = [None] * len(tasks)
+  with ProcessPoolExecutor(workers) as pool:
+    for c, result in zip(order, pool.map(component_worker, [ tasks[c] for c in order ])):
+      results[c] = result
+  return list(zip(components, results))
+
+def component_worker(task):
+  '''
+  Pre: task is an (algorithm, graph, args) triple
+  Post: Returns algorithm(graph, *args)
+  '''
+  algorithm, graph, args = task
+  return algorithm(graph, *args)
 
 
 if __name__ == "__main__":
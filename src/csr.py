@@ -0,0 +1,371 @@
+import sys
+import logging
+
+log = logging.getLogger(__name__)
+
+import mmap
+import struct
+import itertools
+from array import array
+from bisect import bisect_left
+from math import inf
+
+# Snapshot file layout, see CSRGraph.save()
+MAGIC = b"DVGBCSR1"
+HEADER = struct.Struct("<8s8sqqq") # magic, weight typecode + byte order, n, e, name bytes
+
+versions = itertools.count(1) # version stamps, shared by all graph types
+
+
+class CSRGraph:
+    '''
+    A frozen compressed-sparse-row graph.  Nodes are mapped to dense integer
+    ids in lexicographical order, and the edges of node i are stored at the
+    positions offsets[i], ..., offsets[i+1]-1 of the targets and weights
+    buffers, again in lexicographical order.
+    '''
+    def __init__(self, names, offsets, targets, weights):
+        '''
+        Initializes a new CSR graph from a lexicographically ordered sequence
+        of node names and the three CSR buffers.
+        '''
+        self._names = names # node id -> node name
+        self._offsets = offsets # node id -> index of its first edge
+        self._targets = targets # edge index -> destination node id
+        self._weights = weights # edge index -> weight
+        self._reverse = None # the same graph with every edge reversed
+        self._path = None # snapshot file that the buffers are mapped from
+        self._version = next_version() # a frozen graph keeps its stamp
+
+    @classmethod
+    def from_adjlist(cls, adjlist):
+        '''
+        Returns a CSR graph that contains the same nodes and edges as the
+        adjacency list `adjlist`.  Edges towards non-members are left out.
+        '''
+        names = adjlist.list_nodes()
+        ids = { name: i for i, name in enumerate(names) }
+        offsets, targets, weights = array("q", [0]), array("i"), []
+
+        node = adjlist.head()
+        while not node.is_empty():
+            edge = node.edges()
+            while not edge.is_empty():
+                dst = ids.get(edge.dst())
+                if dst is not None:
+                    targets.append(dst)
+                    weights.append(edge.weight())
+                edge = edge.tail()
+            offsets.append(len(targets))
+            node = node.tail()
+
+        return cls(names, offsets, targets, weight_array(weights))
+
+    def save(self, path):
+        '''
+        Writes this graph to a binary snapshot file that CSRGraph.open() can
+        map into memory.  After a fixed header, the file holds the name
+        offsets, the UTF-8 encoded names, and the offsets, targets and weights
+        buffers, each starting at a multiple of 8 bytes.
+        '''
+        blobs = [ name.encode("utf-8") for name in self._names ]
+        name_offsets = array("q", [0])
+        for blob in blobs:
+            name_offsets.append(name_offsets[-1] + len(blob))
+
+        code = (self.weight_typecode() + sys.byteorder).encode("ascii")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, code, len(self._names), len(self._targets), name_offsets[-1]))
+            for section in (name_offsets.tobytes(), b"".join(blobs),
+                            array("q", self._offsets).tobytes(),
+                            array("i", self._targets).tobytes(),
+                            array(self.weight_typecode(), self._weights).tobytes()):
+                f.write(section + bytes(-len(section) % 8))
+
+    @classmethod
+    def open(cls, path):
+        '''
+        Returns the graph in the snapshot file `path` (see save()) without
+        reading it into Python objects: the file is mapped read-only, and the
+        buffers are views of the mapping.  Node names are decoded on access, so
+        processes that open the same file share its pages.
+        '''
+        with open(path, "rb") as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        magic, code, n, e, name_bytes = HEADER.unpack_from(view)
+        code = code.rstrip(b"\0").decode("ascii")
+        if magic != MAGIC:
+            raise ValueError("{} is not a graph snapshot".format(path))
+        if code[1:] != sys.byteorder:
+            raise ValueError("{} was saved with {} byte order".format(path, code[1:]))
+
+        sections, pos = [], HEADER.size
+        for (size, fmt) in ((8*(n+1), "q"), (name_bytes, "B"), (8*(n+1), "q"), (4*e, "i"), (8*e, code[0])):
+            sections.append(view[pos:pos+size].cast(fmt))
+            pos += size + (-size % 8)
+
+        name_offsets, blob, offsets, targets, weights = sections
+        graph = cls(NameTable(blob, name_offsets), offsets, targets, weights)
+        graph._path = path
+        return graph
+
+    def __reduce__(self):
+        '''
+        Pickles a mapped graph as its snapshot path, so that e.g. worker
+        processes map the same file instead of receiving a copy.
+        '''
+        if self._path is not None:
+            return (CSRGraph.open, (self._path,))
+        return (CSRGraph, (list(self._names), self._offsets, self._targets, self._weights))
+
+    def version(self):
+        '''
+        Returns the version stamp of this graph, see AdjacencyList.version().
+        '''
+        return self._version
+
+    def is_empty(self):
+        '''
+        Returns true if this graph has no nodes.
+        '''
+        return len(self._names) == 0
+
+    def names(self):
+        '''
+        Returns the node names, indexed by node id.
+        '''
+        return self._names
+
+    def offsets(self):
+        '''
+        Returns the N+1 edge offsets, indexed by node id.
+        '''
+        return self._offsets
+
+    def targets(self):
+        '''
+        Returns the destination node id of each edge.
+        '''
+        return self._targets
+
+    def weights(self):
+        '''
+        Returns the weight of each edge.
+        '''
+        return self._weights
+
+    def reverse(self):
+        '''
+        Returns a CSRGraph with the same nodes where every edge is reversed,
+        i.e., the in-edges of each node in lexicographical order.  It is built
+        with one counting sort on first use and then kept.
+        '''
+        if self._reverse is not None:
+            return self._reverse
+
+        n = len(self._names)
+        offsets = array("q", [0]) * (n+1)
+        for v in self._targets:
+            offsets[v+1] += 1
+        for v in range(n):
+            offsets[v+1] += offsets[v]
+
+        targets = array("i", [0]) * len(self._targets)
+        weights = array(self.weight_typecode(), [0]) * len(self._weights)
+        free = array("q", offsets) # next free position in each reversed row
+        for u in range(n):
+            for i in range(self._offsets[u], self._offsets[u+1]):
+                v = self._targets[i]
+                targets[free[v]] = u
+                weights[free[v]] = self._weights[i]
+                free[v] += 1
+
+        self._reverse = CSRGraph(self._names, offsets, targets, weights)
+        self._reverse._reverse = self
+        return self._reverse
+
+    def subgraph(self, ids):
+        '''
+        Returns the CSRGraph induced by the ascending node ids `ids`, i.e.,
+        those nodes and the edges between them.  Edges that leave the
+        subgraph are left out.
+        '''
+        position = { v: i for i, v in enumerate(ids) } # old id -> new id
+        offsets, targets = array("q", [0]), array("i")
+        weights = array(self.weight_typecode())
+        for u in ids:
+            for i in range(self._offsets[u], self._offsets[u+1]):
+                v = position.get(self._targets[i])
+                if v is not None:
+                    targets.append(v)
+                    weights.append(self._weights[i])
+            offsets.append(len(targets))
+        return CSRGraph([ self._names[v] for v in ids ], offsets, targets, weights)
+
+    def weight_typecode(self):
+        '''
+        Returns "q" if all weights are integers and "d" otherwise.
+        '''
+        return getattr(self._weights, "typecode", None) or self._weights.format
+
+    def node_id(self, name):
+        '''
+        Returns the id of the node named `name`, or None if it is a non-member.
+        '''
+        i = bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            return i
+        return None
+
+    def node_name(self, i):
+        '''
+        Returns the name of the node with id `i`.
+        '''
+        return self._names[i]
+
+    def find_node(self, name):
+        '''
+        Returns True if the node named `name` is a member.
+        '''
+        return self.node_id(name) is not None
+
+    def find_edge(self, src, dst):
+        '''
+        Returns True if there's an edge from node `src` to node `dst`.
+        '''
+        u, v = self.node_id(src), self.node_id(dst)
+        if u is None or v is None:
+            return False
+        lo, hi = self._offsets[u], self._offsets[u+1]
+        i = bisect_left(self._targets, v, lo, hi)
+        return i < hi and self._targets[i] == v
+
+    def node_cardinality(self):
+        '''
+        Returns the number of nodes.
+        '''
+        return len(self._names)
+
+    def edge_cardinality(self):
+        '''
+        Returns the number of edges.
+        '''
+        return len(self._targets)
+
+    def self_loops(self):
+        '''
+        Returns the number of nodes that have an edge towards themselves.
+        '''
+        count = 0
+        for u in range(len(self._names)):
+            for i in range(self._offsets[u], self._offsets[u+1]):
+                if self._targets[i] == u:
+                    count += 1
+        return count
+
+    def list_nodes(self):
+        '''
+        Returns a list of node names in lexicographical order.
+        '''
+        return list(self._names)
+
+    def list_edges(self):
+        '''
+        Returns a list of (src, dst, weight) edges in lexicographical order.
+        '''
+        edges = []
+        for u in range(len(self._names)):
+            src = self._names[u]
+            for i in range(self._offsets[u], self._offsets[u+1]):
+                edges.append((src, self._names[self._targets[i]], self._weights[i]))
+        return edges
+
+    def adjacency_matrix(self, sparse=False, out=None):
+        '''
+        Returns this graph as an NxN adjacency matrix, using inf for missing
+        edges, as a dict of dicts if `sparse` is True, or written into the flat
+        buffer `out` if given.  See AdjacencyList.adjacency_matrix().
+        '''
+        if out is not None:
+            n = len(self._names)
+            clear_matrix(out, n)
+            for u in range(n):
+                for i in range(self._offsets[u], self._offsets[u+1]):
+                    out[u*n + self._targets[i]] = self._weights[i]
+            return out
+
+        if sparse:
+            matrix = {}
+            for u in range(len(self._names)):
+                lo, hi = self._offsets[u], self._offsets[u+1]
+                matrix[u] = dict(zip(self._targets[lo:hi], self._weights[lo:hi]))
+            return matrix
+
+        if self.is_empty():
+            return [[]]
+        return list(self.iter_rows())
+
+    def iter_rows(self):
+        '''
+        Yields the rows of the adjacency matrix one at a time in
+        lexicographical order.
+        '''
+        n = len(self._names)
+        for u in range(n):
+            row = [inf] * n
+            for i in range(self._offsets[u], self._offsets[u+1]):
+                row[self._targets[i]] = self._weights[i]
+            yield row
+
+def clear_matrix(out, n):
+    '''
+    Fills the first n*n values of the flat buffer `out` with inf.  Raises
+    ValueError if `out` has room for fewer values.
+    '''
+    if len(out) < n*n:
+        raise ValueError("matrix buffer holds {} values, {} needed".format(len(out), n*n))
+    row = array("d", [inf]) * n
+    for i in range(n):
+        out[i*n:(i+1)*n] = row
+
+def next_version():
+    '''
+    Returns a new, never before used version stamp.
+    '''
+    return next(versions)
+
+class NameTable:
+    '''
+    A read-only sequence of node names that are stored back to back as UTF-8
+    in one buffer, decoding each name when it is accessed.
+    '''
+    def __init__(self, blob, offsets):
+        self._blob = blob # all names, encoded
+        self._offsets = offsets # name i is blob[offsets[i]:offsets[i+1]]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("name index out of range")
+        return bytes(self._blob[self._offsets[i]:self._offsets[i+1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def weight_array(weights):
+    '''
+    Returns `weights` packed into an array, keeping integer weights as
+    integers and falling back on doubles otherwise.
+    '''
+    try:
+        return array("q", weights)
+    except (TypeError, OverflowError):
+        return array("d", weights)
+
+if __name__ == "__main__":
+    log.critical("module contains no main method")
+    sys.exit(1)
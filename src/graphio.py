@@ -0,0 +1,83 @@
+import sys
+import logging
+
+log = logging.getLogger(__name__)
+
+import csv
+from adjlist import AdjacencyList
+from csr import CSRGraph
+
+
+def load_edge_list(source, delimiter=None, undirected=False, header=False):
+    '''
+    Returns an adjacency list with the edges of a CSV/TSV edge list, where
+    each row is `src, dst[, weight]`.  Blank rows and rows starting with "#"
+    are skipped, and a missing weight defaults to 1.  If `undirected` is True,
+    every edge is added in both directions.  If `header` is True, the first
+    remaining row is a header such as `src,dst,weight` and is skipped too.
+
+    The source is either a file path or an open text file.  Rows are read one
+    at a time, and the adjacency list is then built in a single pass with
+    AdjacencyList.from_edges().
+
+    Pre: node names do not contain the delimiter.
+    '''
+    if hasattr(source, "read"):
+        return AdjacencyList.from_edges(read_edges(source, delimiter or ",", undirected, header))
+
+    if delimiter is None:
+        delimiter = "\t" if str(source).endswith(".tsv") else ","
+    with open(source, newline="") as f:
+        return AdjacencyList.from_edges(read_edges(f, delimiter, undirected, header))
+
+def save_snapshot(adjlist, path):
+    '''
+    Writes an AdjacencyList (or CSRGraph) to a binary snapshot file, see
+    CSRGraph.save().
+    '''
+    graph = adjlist if isinstance(adjlist, CSRGraph) else adjlist.snapshot()
+    graph.save(path)
+
+def load_snapshot(path):
+    '''
+    Returns the read-only, memory-mapped CSRGraph in a snapshot file.  All
+    functions in algorithm.py accept it as is.
+    '''
+    return CSRGraph.open(path)
+
+def read_edges(f, delimiter, undirected, header=False):
+    '''
+    Yields (src, dst, weight) triples from the edge list in the open file `f`,
+    see load_edge_list().
+    '''
+    for line, row in enumerate(csv.reader(f, delimiter=delimiter), 1):
+        row = [ field.strip() for field in row ]
+        if len(row) == 0 or row == [""] or row[0].startswith("#"):
+            continue
+        if header:
+            header = False
+            continue
+        if len(row) not in (2, 3) or "" in row:
+            raise ValueError("line {}: expected src, dst[, weight]".format(line))
+
+        weight = parse_weight(row[2], line) if len(row) == 3 else 1
+        yield (row[0], row[1], weight)
+        if undirected:
+            yield (row[1], row[0], weight)
+
+def parse_weight(field, line):
+    '''
+    Returns `field` as an int if possible, otherwise as a float.
+    '''
+    try:
+        return int(field)
+    except ValueError:
+        pass
+    try:
+        return float(field)
+    except ValueError:
+        raise ValueError("line {}: invalid weight '{}'".format(line, field)) from None
+
+if __name__ == "__main__":
+    log.critical("module contains no main method")
+    sys.exit(1)
@@ -7,7 +7,7 @@ log = logging.getLogger(__name__)
 
 from math import inf
 from adjlist import AdjacencyList
-from algorithm import dijkstra,prim,warshall,floyd
+from algorithm import dijkstra,prim,warshall,IncrementalAPSP,result_cache
 
 class TerminalUI:
     def __init__(self, mode="directed"):
@@ -16,6 +16,7 @@ class TerminalUI:
         '''
         self._mode = mode if mode=="directed" else "undirected"
         self._adjlist = AdjacencyList()
+        self._apsp = None # kept up to date once Floyd's algorithm has run
         log.info("running in mode: {}".format(self._mode))
 
     def run(self):
@@ -178,7 +179,7 @@ class TerminalUI:
         log.debug("all nodes: {}".format(nodes))
         log.debug("all edges: {}".format(self._adjlist.list_edges()))
         self.display_matrix_head(nodes)
-        self.display_matrix_data(nodes, self._adjlist.adjacency_matrix())
+        self.display_matrix_data(nodes, self._adjlist.iter_rows())
         self.display_cardinality()
 
     def add_node(self):
@@ -190,7 +191,7 @@ class TerminalUI:
             self.display_error(err)
             return
 
-        self._adjlist = self._adjlist.add_node(name)
+        self.edit("add_node", name)
 
     def delete_node(self):
         '''
@@ -201,8 +202,8 @@ class TerminalUI:
             self.display_error(err)
             return
 
-        self._adjlist = self._adjlist.delete_edges(name)
-        self._adjlist = self._adjlist.delete_node(name)
+        self.edit("delete_edges", name)
+        self.edit("delete_node", name)
 
     def add_edge(self):
         '''
@@ -223,9 +224,9 @@ class TerminalUI:
             self.display_error(err)
             return
 
-        self._adjlist = self._adjlist.add_edge(from_node, to_node, weight) #ÄNDRADE FRÅN ADJ_LIST TILL _ADJLIST
+        self.edit("add_edge", from_node, to_node, weight) #ÄNDRADE FRÅN ADJ_LIST TILL _ADJLIST
         if self._mode == "undirected":
-            self._adjlist = self._adjlist.add_edge(to_node, from_node, weight)
+            self.edit("add_edge", to_node, from_node, weight)
 
     def delete_edge(self):
         '''
@@ -245,9 +246,21 @@ class TerminalUI:
             self.display_error("edge ({},{}) is non-member".format(from_node, to_node))
             return
 
-        self._adjlist = self._adjlist.delete_edge(from_node, to_node)
+        self.edit("delete_edge", from_node, to_node)
         if self._mode == "undirected":
-            self._adjlist = self._adjlist.delete_edge(to_node, from_node)
+            self.edit("delete_edge", to_node, from_node)
+
+    def edit(self, op, *args):
+        '''
+        Applies the adjacency list operation named `op` to the graph.  Once
+        Floyd's algorithm has run, edits go through its incremental all-pairs
+        distances so that the next run doesn't start from scratch.
+        '''
+        if self._apsp is None:
+            self._adjlist = getattr(self._adjlist, op)(*args)
+        else:
+            getattr(self._apsp, op)(*args)
+            self._adjlist = self._apsp.adjlist()
 
     def find_node(self):
         '''
@@ -292,7 +305,7 @@ class TerminalUI:
         
         nodes = self._adjlist.list_nodes()
         self.display_matrix_head(nodes)
-        self.display_matrix_data(nodes, warshall(self._adjlist))
+        self.display_matrix_data(nodes, result_cache.call(warshall, self._adjlist))
 
     def floyd(self):
         '''
@@ -302,9 +315,11 @@ class TerminalUI:
             self.display_error("graph is empty")
             return
         
+        if self._apsp is None:
+            self._apsp = IncrementalAPSP(self._adjlist)
         nodes = self._adjlist.list_nodes()
         self.display_matrix_head(nodes)
-        self.display_matrix_data(nodes, floyd(self._adjlist))
+        self.display_matrix_data(nodes, self._apsp.matrix())
 
     def dijkstra(self):
         '''
@@ -318,7 +333,7 @@ class TerminalUI:
             self.display_error(err)
             return
 
-        dist, prev = dijkstra(self._adjlist, start_node)
+        dist, prev = result_cache.call(dijkstra, self._adjlist, start_node)
         self.display_sequence_head(self._adjlist.list_nodes())
         self.display_sequence_data([
             ("distance", dist, None),
@@ -340,7 +355,7 @@ class TerminalUI:
             self.display_error(err)
             return
 
-        lowcost, closest = prim(self._adjlist, start_node)
+        lowcost, closest = result_cache.call(prim, self._adjlist, start_node)
         self.display_sequence_head(self._adjlist.list_nodes())
         self.display_sequence_data([
             ("lowcost", lowcost, None),